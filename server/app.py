@@ -1,66 +1,249 @@
 # app.py
 
-from flask import Flask, request, make_response, jsonify
-from flask_migrate import Migrate
+import click
+from flask import Blueprint, Flask, current_app, request, make_response, jsonify
 from sqlalchemy.exc import IntegrityError, OperationalError # Import OperationalError for db issues
 from models import db, Author, Post # Import your models
+from pagination import InvalidPageRequest, parse_page_args, keyset_page
+from streaming import wants_stream, stream_query
+from loading import InvalidFieldsRequest, parse_fields, eager_options
+from serializers import compile_serializer
+from bulk import InvalidBulkRequest, parse_rows, create_authors, summarize, ingest_posts
+import json_provider
+import group_commit
+import sqlite_tuning
+import cache
+import conditional
+import name_index
+import instrumentation
+import metrics
+import profiling
 
-app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///app.db' # Database will be in the server directory
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.json.compact = False
+DEFAULT_CONFIG = {
+    'SQLALCHEMY_DATABASE_URI': 'sqlite:///app.db', # Database will be in the server directory
+    'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+    # None: compact JSON in production, pretty-printed in debug mode
+    'JSON_COMPACT': None,
+    # Relationship loading per endpoint, see loading.DEFAULT_EAGER_LOADING
+    'EAGER_LOADING': {},
+    # Upper bound on rows accepted by one bulk create request
+    'BULK_MAX_ROWS': 100_000,
+    # Rows inserted per transaction by POST /posts/bulk (override with ?chunk_size=N)
+    'POSTS_BULK_CHUNK_SIZE': 1000,
+    # Connection PRAGMAs, see the presets in sqlite_tuning.py
+    'SQLITE_PRAGMA_PRESET': 'wal',
+    'SQLITE_PRAGMAS': {},
+    # Serialized bodies of the by-id routes; a size of 0 disables the cache
+    'RESPONSE_CACHE_SIZE': 10_000,
+    'RESPONSE_CACHE_TTL': 60, # seconds
+    # In-memory author name index for duplicate checks: 'set', 'bloom' or None
+    'NAME_INDEX': 'set',
+    # Server-Timing headers and per-route histograms (GET /timings)
+    'INSTRUMENTATION': True,
+    'SERVER_TIMING': True,
+    # Prometheus metrics on GET /metrics
+    'METRICS': True,
+    # Per-request profiles, see profiling.py: a kind for every request, or a
+    # secret that enables the signed X-Profile header
+    'PROFILING': None,
+    'PROFILING_SECRET': None,
+    'PROFILING_DIR': 'profiles',
+    # None: register Flask-Migrate only when running under the `flask` CLI
+    'MIGRATE': None,
+}
 
-migrate = Migrate(app, db)
+api = Blueprint('api', __name__)
+
+# Compiled once at import; produce the same dicts as to_dict()
+serialize_author = compile_serializer(Author)
+serialize_post = compile_serializer(Post)
+
+
+def init_migrate(app):
+    # Flask-Migrate imports Alembic, which is the bulk of the cold-start
+    # time and only needed by the `flask db` commands.
+    from flask_migrate import Migrate
+    Migrate(app, db, render_as_batch=True) # SQLite needs batch mode for ALTER TABLE
+
+
+def create_app(config=None):
+    app = Flask(__name__)
+    app.config.from_mapping(DEFAULT_CONFIG)
+    if config:
+        app.config.from_mapping(config)
+
+    json_provider.init_app(app)
+    # Set GROUP_COMMIT = True to batch concurrent creates into shared transactions
+    group_commit.init_app(app)
+    cache.init_app(app)
+
+    migrate = app.config['MIGRATE']
+    if migrate is None:
+        # The flask CLI loads the app inside a click context; gunicorn,
+        # pytest and scripts do not.
+        migrate = click.get_current_context(silent=True) is not None
+    if migrate:
+        init_migrate(app)
+
+    db.init_app(app)
+    sqlite_tuning.init_app(app, db)
+    name_index.init_app(app)
+    instrumentation.init_app(app, db)
+    metrics.init_app(app, db)
+
+    app.register_blueprint(api)
+    profiling.init_app(app)
+    return app
 
-db.init_app(app)
 
 # --- Custom Error Handlers ---
-@app.errorhandler(404)
+@api.app_errorhandler(404)
 def not_found(error):
-    message = str(error) if isinstance(error, Exception) else "Resource not found"
+    message = str(error) if isinstance(error, (Exception, str)) else "Resource not found"
     return make_response(jsonify({"error": message}), 404)
 
-@app.errorhandler(400)
+@api.app_errorhandler(400)
 def bad_request(error):
-    message = str(error) if isinstance(error, Exception) else "Bad Request"
+    message = str(error) if isinstance(error, (Exception, str)) else "Bad Request"
     return make_response(jsonify({"error": message}), 400)
 
-@app.errorhandler(500)
+@api.app_errorhandler(500)
 def internal_server_error(error):
-    message = str(error) if isinstance(error, Exception) else "Internal Server Error"
+    message = str(error) if isinstance(error, (Exception, str)) else "Internal Server Error"
     return make_response(jsonify({"error": message}), 500)
 
 # --- Routes ---
 
-@app.route('/')
+@api.route('/')
 def index():
     return '<h1>Flask-SQLAlchemy Validations Lab API</h1>'
 
+# GET /cache/stats: Hit/miss counters of the by-id response cache
+@api.route('/cache/stats', methods=['GET'])
+def get_cache_stats():
+    return make_response(jsonify(current_app.extensions['response_cache'].stats()), 200)
+
+# GET /timings: Per-route histograms of latency, DB time, serialization time and query count
+@api.route('/timings', methods=['GET'])
+def get_timings():
+    timings = current_app.extensions.get('timings')
+    if timings is None:
+        return not_found("Instrumentation is disabled.")
+    return make_response(jsonify(timings.snapshot()), 200)
+
+# GET /metrics: Prometheus text exposition of request, validation and pool metrics
+@api.route('/metrics', methods=['GET'])
+def get_metrics():
+    registry = metrics.get_registry()
+    if registry is None:
+        return not_found("Metrics are disabled.")
+    return current_app.response_class(metrics.render(registry, db.engine), status=200, mimetype=metrics.CONTENT_TYPE)
+
 # --- Author Routes ---
 
-# GET /authors: Get all authors
-@app.route('/authors', methods=['GET'])
+# GET /authors: Get a page of authors (?after=<cursor>&limit=N&sort=[-]id|created_at)
+# or every author as a stream (?stream=1|ndjson or Accept: application/x-ndjson);
+# ?fields=a,b restricts the attributes that are SELECTed and returned
+@api.route('/authors', methods=['GET'])
 def get_authors():
     try:
-        authors = Author.query.all()
-        return make_response(jsonify([author.to_dict() for author in authors]), 200)
+        fields = parse_fields(request.args, Author)
+    except InvalidFieldsRequest as e:
+        return bad_request(str(e))
+    serialize = compile_serializer(Author, fields)
+
+    mode = wants_stream(request)
+    if mode:
+        # Full-table listing, written to the socket row by row
+        query = Author.query.options(*eager_options('authors.stream', Author, fields)).order_by(Author.id)
+        return stream_query(query, serialize, mode)
+
+    try:
+        cursor, limit, sort = parse_page_args(request.args)
+    except InvalidPageRequest as e:
+        return bad_request(str(e))
+
+    try:
+        columns = (sort.lstrip('-'),) + conditional.VALIDATOR_COLUMNS
+        options = eager_options('authors.list', Author, fields, extra_columns=columns)
+        authors, next_cursor = keyset_page(Author.query.options(*options), Author, cursor, limit, sort)
+        etag, last_modified = conditional.page_validators(authors, fields, extra=next_cursor)
+        return conditional.respond(etag, last_modified, lambda: make_response(jsonify({
+            "data": [serialize(author) for author in authors],
+            "next": next_cursor,
+        }), 200))
+    except InvalidPageRequest as e: # e.g. a tampered created_at cursor
+        return bad_request(str(e))
     except Exception as e:
         db.session.rollback()
         return internal_server_error(str(e))
 
-# GET /authors/<int:id>: Get a single author by ID
-@app.route('/authors/<int:id>', methods=['GET'])
+# GET /authors/<int:id>: Get a single author by ID (?fields=a,b to select attributes);
+# answers If-None-Match / If-Modified-Since with 304
+@api.route('/authors/<int:id>', methods=['GET'])
 def get_author_by_id(id):
-    author = Author.query.get(id)
+    try:
+        fields = parse_fields(request.args, Author)
+    except InvalidFieldsRequest as e:
+        return bad_request(str(e))
+
+    response_cache = current_app.extensions['response_cache']
+    key = ('Author', id, fields)
+    cached = response_cache.get(key)
+    if cached is not None:
+        body, etag, last_modified = cached
+        return conditional.respond(etag, last_modified, lambda: current_app.response_class(body, status=200, mimetype='application/json'))
+    version = response_cache.version
+
+    options = eager_options('authors.detail', Author, fields, extra_columns=conditional.VALIDATOR_COLUMNS)
+    author = db.session.get(Author, id, options=options)
     if not author:
         return not_found(f"Author with id {id} not found.")
     try:
-        return make_response(jsonify(author.to_dict()), 200)
+        etag, last_modified = conditional.validators([author], fields)
+
+        def build():
+            response = make_response(jsonify(compile_serializer(Author, fields)(author)), 200)
+            response_cache.set(key, (response.get_data(), etag, last_modified), [('Author', id)], version)
+            return response
+
+        return conditional.respond(etag, last_modified, build)
     except Exception as e:
         return internal_server_error(str(e))
 
+# GET /authors/<int:id>/posts: Get a page of an author's posts, oldest first
+# (?after=<cursor>&limit=N&sort=[-]created_at|id&fields=a,b)
+@api.route('/authors/<int:id>/posts', methods=['GET'])
+def get_author_posts(id):
+    try:
+        fields = parse_fields(request.args, Post)
+        cursor, limit, sort = parse_page_args(request.args, default_sort='created_at')
+    except (InvalidFieldsRequest, InvalidPageRequest) as e:
+        return bad_request(str(e))
+
+    if db.session.query(Author.id).filter_by(id=id).first() is None:
+        return not_found(f"Author with id {id} not found.")
+
+    try:
+        # Range scan on ix_posts_author_id_created_at
+        columns = (sort.lstrip('-'),) + conditional.VALIDATOR_COLUMNS
+        options = eager_options('authors.posts', Post, fields, extra_columns=columns)
+        query = Post.query.filter(Post.author_id == id).options(*options)
+        posts, next_cursor = keyset_page(query, Post, cursor, limit, sort)
+        etag, last_modified = conditional.page_validators(posts, fields, extra=next_cursor)
+        serialize = compile_serializer(Post, fields)
+        return conditional.respond(etag, last_modified, lambda: make_response(jsonify({
+            "data": [serialize(post) for post in posts],
+            "next": next_cursor,
+        }), 200))
+    except InvalidPageRequest as e: # e.g. a tampered created_at cursor
+        return bad_request(str(e))
+    except Exception as e:
+        db.session.rollback()
+        return internal_server_error(str(e))
+
 # POST /authors: Create a new author (will trigger validations)
-@app.route('/authors', methods=['POST'])
+@api.route('/authors', methods=['POST'])
 def create_author():
     data = request.get_json()
     if not data:
@@ -71,11 +254,12 @@ def create_author():
             name=data.get('name'),
             phone_number=data.get('phone_number')
         )
-        db.session.add(new_author)
-        db.session.commit()
-        return make_response(jsonify(new_author.to_dict()), 201)
+        new_author = group_commit.save(new_author)
+        with instrumentation.timed('serialize'):
+            return make_response(jsonify(serialize_author(new_author)), 201)
     except ValueError as e: # Catch validation errors from @validates
         db.session.rollback()
+        metrics.count_validation_failures([e])
         return bad_request(str(e))
     except IntegrityError: # Catch unique constraint violations (e.g., duplicate name)
         db.session.rollback()
@@ -84,31 +268,100 @@ def create_author():
         db.session.rollback()
         return internal_server_error(str(e))
 
+# POST /authors/bulk: Create many authors (JSON array or NDJSON body) in one transaction
+@api.route('/authors/bulk', methods=['POST'])
+def create_authors_bulk():
+    try:
+        rows = parse_rows(request)
+    except InvalidBulkRequest as e:
+        return bad_request(str(e))
+
+    try:
+        results = create_authors(rows)
+        metrics.count_validation_failures(result['error'] for result in results if 'error' in result)
+        with instrumentation.timed('serialize'):
+            return make_response(jsonify(summarize(results)), 200)
+    except Exception as e:
+        db.session.rollback()
+        return internal_server_error(str(e))
+
 # --- Post Routes ---
 
-# GET /posts: Get all posts
-@app.route('/posts', methods=['GET'])
+# GET /posts: Get a page of posts (?after=<cursor>&limit=N&sort=[-]id|created_at)
+# or every post as a stream (?stream=1|ndjson or Accept: application/x-ndjson);
+# ?fields=a,b restricts the attributes that are SELECTed and returned
+@api.route('/posts', methods=['GET'])
 def get_posts():
     try:
-        posts = Post.query.all()
-        return make_response(jsonify([post.to_dict() for post in posts]), 200)
+        fields = parse_fields(request.args, Post)
+    except InvalidFieldsRequest as e:
+        return bad_request(str(e))
+    serialize = compile_serializer(Post, fields)
+
+    mode = wants_stream(request)
+    if mode:
+        # Full-table listing, written to the socket row by row
+        query = Post.query.options(*eager_options('posts.stream', Post, fields)).order_by(Post.id)
+        return stream_query(query, serialize, mode)
+
+    try:
+        cursor, limit, sort = parse_page_args(request.args)
+    except InvalidPageRequest as e:
+        return bad_request(str(e))
+
+    try:
+        columns = (sort.lstrip('-'),) + conditional.VALIDATOR_COLUMNS
+        options = eager_options('posts.list', Post, fields, extra_columns=columns)
+        posts, next_cursor = keyset_page(Post.query.options(*options), Post, cursor, limit, sort)
+        etag, last_modified = conditional.page_validators(posts, fields, extra=next_cursor)
+        return conditional.respond(etag, last_modified, lambda: make_response(jsonify({
+            "data": [serialize(post) for post in posts],
+            "next": next_cursor,
+        }), 200))
+    except InvalidPageRequest as e: # e.g. a tampered created_at cursor
+        return bad_request(str(e))
     except Exception as e:
         db.session.rollback()
         return internal_server_error(str(e))
 
-# GET /posts/<int:id>: Get a single post by ID
-@app.route('/posts/<int:id>', methods=['GET'])
+# GET /posts/<int:id>: Get a single post by ID (?fields=a,b to select attributes);
+# answers If-None-Match / If-Modified-Since with 304
+@api.route('/posts/<int:id>', methods=['GET'])
 def get_post_by_id(id):
-    post = Post.query.get(id)
+    try:
+        fields = parse_fields(request.args, Post)
+    except InvalidFieldsRequest as e:
+        return bad_request(str(e))
+
+    response_cache = current_app.extensions['response_cache']
+    key = ('Post', id, fields)
+    cached = response_cache.get(key)
+    if cached is not None:
+        body, etag, last_modified = cached
+        return conditional.respond(etag, last_modified, lambda: current_app.response_class(body, status=200, mimetype='application/json'))
+    version = response_cache.version
+
+    options = eager_options('posts.detail', Post, fields, extra_columns=conditional.VALIDATOR_COLUMNS)
+    post = db.session.get(Post, id, options=options)
     if not post:
         return not_found(f"Post with id {id} not found.")
     try:
-        return make_response(jsonify(post.to_dict()), 200)
+        etag, last_modified = conditional.validators([post], fields)
+
+        def build():
+            response = make_response(jsonify(compile_serializer(Post, fields)(post)), 200)
+            tags = [('Post', id)]
+            if fields is None or 'author' in fields:
+                tags.append(('Author', post.author_id))
+            response_cache.set(key, (response.get_data(), etag, last_modified), tags, version)
+            return response
+
+        return conditional.respond(etag, last_modified, build)
     except Exception as e:
         return internal_server_error(str(e))
 
 # POST /posts: Create a new post (will trigger validations)
-@app.route('/posts', methods=['POST'])
+@api.route('/posts', methods=['POST'])
 def create_post():
     data = request.get_json()
     if not data:
@@ -122,11 +375,12 @@ def create_post():
             category=data.get('category'),
             author_id=data.get('author_id')
         )
-        db.session.add(new_post)
-        db.session.commit()
-        return make_response(jsonify(new_post.to_dict()), 201)
+        new_post = group_commit.save(new_post)
+        with instrumentation.timed('serialize'):
+            return make_response(jsonify(serialize_post(new_post)), 201)
     except ValueError as e: # Catch validation errors from @validates
         db.session.rollback()
+        metrics.count_validation_failures([e])
         return bad_request(str(e))
     except IntegrityError: # Catch foreign key or other integrity errors
         db.session.rollback()
@@ -135,10 +389,35 @@ def create_post():
         db.session.rollback()
         return internal_server_error(str(e))
 
+# POST /posts/bulk: Ingest an NDJSON body of posts, committed in chunks
+@api.route('/posts/bulk', methods=['POST'])
+def create_posts_bulk():
+    try:
+        chunk_size = int(request.args.get('chunk_size', current_app.config['POSTS_BULK_CHUNK_SIZE']))
+    except ValueError:
+        return bad_request("chunk_size must be an integer.")
+    if chunk_size < 1:
+        return bad_request("chunk_size must be at least 1.")
+
+    try:
+        result = ingest_posts(request.stream, chunk_size)
+        metrics.count_validation_failures(error['error'] for error in result['errors'])
+        return make_response(jsonify(result), 200)
+    except Exception as e:
+        db.session.rollback()
+        return internal_server_error(str(e))
+
+# Kept for `from app import app` in scripts and tests; servers can use create_app().
+app = create_app()
+
 if __name__ == '__main__':
     # Ensure tables are created if running app.py directly without full migrations
     # This is helpful for quick local testing and development.
     with app.app_context():
         db.create_all() 
+        # Fill the duplicate-name index now rather than on the first POST /authors.
+        names_index = name_index.get_index()
+        if names_index is not None:
+            names_index.warm()
     app.run(port=5555, debug=True)
 
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# HTTP benchmark of every route against a freshly seeded scratch database,
+# through the Flask test client and through a real WSGI server (werkzeug,
+# threaded, HTTP/1.1 keep-alive). Reports throughput, p50/p95/p99 latency
+# and the peak memory each route allocates, and stores the results as JSON so runs on
+# different commits can be compared:
+#
+#   cd server && python -m benchmarks.bench_http --authors 10000 --posts-per-author 5 \
+#       --requests 2000 --concurrency 4 --output results.json
+#   python -m benchmarks.bench_http ... --compare results.json
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from app import create_app
+from models import db
+from seed import seed_database
+
+CONTENT = 'Top Secret content. ' * 15
+
+
+def scenarios(authors, posts):
+    # name -> function(rng, n) returning (method, path, JSON body or None).
+    return {
+        'GET /authors': lambda rng, n: ('GET', '/authors?limit=50', None),
+        'GET /posts': lambda rng, n: ('GET', '/posts?limit=50', None),
+        'GET /authors/<id>': lambda rng, n: ('GET', f'/authors/{rng.randint(1, authors)}', None),
+        'GET /posts/<id>': lambda rng, n: ('GET', f'/posts/{rng.randint(1, posts)}', None),
+        'GET /authors/<id>/posts': lambda rng, n: ('GET', f'/authors/{rng.randint(1, authors)}/posts', None),
+        'POST /authors': lambda rng, n: ('POST', '/authors', {'name': f'Bench {n} {rng.random()}', 'phone_number': '1231144321'}),
+        'POST /posts': lambda rng, n: ('POST', '/posts', {
+            'title': 'Top Secret', 'content': CONTENT, 'category': 'Fiction', 'author_id': rng.randint(1, authors),
+        }),
+    }
+
+
+def client_sender(app):
+    local = threading.local()
+
+    def send(method, path, body):
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = app.test_client()
+        return client.open(path, method=method, json=body).status_code
+
+    return send, lambda: None
+
+
+class _KeepAliveHandler(WSGIRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def wsgi_sender(app):
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=_KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    local = threading.local()
+
+    def send(method, path, body):
+        connection = getattr(local, 'connection', None)
+        if connection is None:
+            connection = local.connection = http.client.HTTPConnection('127.0.0.1', server.server_port)
+        headers = {}
+        if body is not None:
+            body = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        connection.request(method, path, body=body, headers=headers)
+        response = connection.getresponse()
+        response.read()
+        return response.status
+
+    return send, server.shutdown
+
+
+def drive(send, scenario, requests, concurrency, seed):
+    # Sends `requests` requests from `concurrency` threads; returns the
+    # latencies (seconds), the number of non-2xx responses and the wall time.
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def worker(index):
+        rng = random.Random(f'{seed}:{index}')
+        mine, failed = [], 0
+        for n in range(index, requests, concurrency):
+            method, path, body = scenario(rng, n)
+            started = time.perf_counter()
+            status = send(method, path, body)
+            mine.append(time.perf_counter() - started)
+            failed += not 200 <= status < 300
+        with lock:
+            latencies.extend(mine)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors[0], time.perf_counter() - started
+
+
+def traced_peak_mib(run):
+    # Peak of the Python memory allocated while run() executes. tracemalloc
+    # slows every allocation down, so only untimed runs are traced.
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / (1024 * 1024)
+
+
+def summarize(target, name, latencies, errors, elapsed, peak_mib):
+    cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+    return {
+        'target': target,
+        'route': name,
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput': len(latencies) / elapsed,
+        'p50_ms': cuts[49] * 1000,
+        'p95_ms': cuts[94] * 1000,
+        'p99_ms': cuts[98] * 1000,
+        'peak_alloc_mib': peak_mib,
+    }
+
+
+def commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline):
+    # Percentage change of throughput and p99 against a previous run.
+    previous = {(row['target'], row['route']): row for row in baseline['results']}
+    print(f"\nvs {baseline.get('commit') or 'baseline'}:")
+    print(f"{'target':<7} {'route':<24} {'req/s':>9} {'p99':>9}")
+    for row in results:
+        before = previous.get((row['target'], row['route']))
+        if before is None:
+            continue
+        throughput = (row['throughput'] / before['throughput'] - 1) * 100
+        p99 = (row['p99_ms'] / before['p99_ms'] - 1) * 100
+        print(f"{row['target']:<7} {row['route']:<24} {throughput:>+8.1f}% {p99:>+8.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--authors', type=int, default=1000)
+    parser.add_argument('--posts-per-author', type=int, default=5)
+    parser.add_argument('--requests', type=int, default=1000, help='per route and target')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--targets', nargs='+', choices=('client', 'wsgi'), default=['client', 'wsgi'])
+    parser.add_argument('--routes', nargs='+', help='subset of route names, e.g. "GET /posts"')
+    parser.add_argument('--no-cache', action='store_true', help='disable the by-id response cache')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='JSON file of an earlier run to compare with')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    config = {'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(directory, 'bench.db')}"}
+    if args.no_cache:
+        config['RESPONSE_CACHE_SIZE'] = 0
+    app = create_app(config)
+    with app.app_context():
+        db.create_all()
+        seed_database(args.authors, args.posts_per_author, seed=args.seed)
+
+    routes = scenarios(args.authors, args.authors * args.posts_per_author)
+    names = args.routes or list(routes)
+    results = []
+    print(f"{'target':<7} {'route':<24} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6} {'peak MiB':>8}")
+    for target in args.targets:
+        send, stop = (client_sender if target == 'client' else wsgi_sender)(app)
+        try:
+            for name in names:
+                # A short warm-up, so connection setup and first-use caches
+                # do not land in the percentiles. It is the traced run: the
+                # memory figure is per route, not the process's lifetime peak.
+                # Seeds include the target, so POST /authors names never repeat.
+                peak_mib = traced_peak_mib(lambda: drive(
+                    send, routes[name], min(50, args.requests), args.concurrency, f'{args.seed}:{target}:warmup',
+                ))
+                latencies, errors, elapsed = drive(send, routes[name], args.requests, args.concurrency, f'{args.seed}:{target}')
+                row = summarize(target, name, latencies, errors, elapsed, peak_mib)
+                results.append(row)
+                print(f"{target:<7} {name:<24} {row['throughput']:>9.0f} {row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} "
+                      f"{row['p99_ms']:>8.2f} {row['errors']:>6} {row['peak_alloc_mib']:>8.1f}")
+        finally:
+            stop()
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'commit': commit(),
+                'python': platform.python_version(),
+                'dataset': {'authors': args.authors, 'posts_per_author': args.posts_per_author, 'seed': args.seed},
+                'requests': args.requests,
+                'concurrency': args.concurrency,
+                'response_cache': not args.no_cache,
+                'results': results,
+            }, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
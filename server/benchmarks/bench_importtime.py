@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# Cold-start cost of importing the server, measured with `python -X importtime`
+# in fresh interpreters. Reports the median total and the slowest top-level
+# packages, so regressions in worker startup show up next to their cause.
+#
+#   cd server && python -m benchmarks.bench_importtime --module app --runs 10 --top 15
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SERVER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(module):
+    # {package: cumulative microseconds} for one cold import of `module`.
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=SERVER, capture_output=True, text=True, check=True,
+    )
+    packages = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Nested imports are indented by two spaces per level.
+        if not name[1:].startswith(' '):
+            packages[name.strip()] = packages.get(name.strip(), 0) + int(cumulative)
+    return packages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--module', default='app')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--json', dest='json_path', help='also write the results to this file')
+    args = parser.parse_args()
+
+    runs = [measure(args.module) for _ in range(args.runs)]
+    totals = [sum(run.values()) for run in runs]
+    medians = {
+        name: statistics.median(run.get(name, 0) for run in runs)
+        for name in set().union(*runs)
+    }
+    slowest = sorted(medians.items(), key=lambda item: item[1], reverse=True)[:args.top]
+
+    print(f"import {args.module}: median {statistics.median(totals) / 1000:.1f} ms, "
+          f"min {min(totals) / 1000:.1f} ms over {args.runs} runs")
+    print(f"{'package':<30} {'ms':>8}")
+    for name, micros in slowest:
+        print(f"{name:<30} {micros / 1000:>8.1f}")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({
+                'module': args.module,
+                'runs': args.runs,
+                'median_ms': statistics.median(totals) / 1000,
+                'min_ms': min(totals) / 1000,
+                'packages_ms': {name: micros / 1000 for name, micros in slowest},
+            }, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+# Model-layer micro-benchmarks for pytest-benchmark. They cover:
+# - constructing Author and Post, which runs every @validates hook
+# - each validator on valid and on invalid input
+# - to_dict() with and without relationships
+# - __repr__
+#
+# The regular test run does not collect this file; pytest-benchmark is a
+# dev package (pipenv install --dev). benchmarks/pytest.ini sets the baseline
+# storage and the regression threshold, and how to record the first
+# baseline on the reference machine. Every later run compares against it:
+#
+#   cd server
+#   pytest benchmarks/bench_models.py
+#
+# Everything runs outside an app context, so validate_name does not consult
+# the name index (name_index.py) and no SQL is involved.
+
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from models import Author, Post
+from benchmarks.bench_validators import CASES, instance_for
+
+AUTHOR = {'name': 'Jane Author', 'phone_number': '1231144321'}
+POST = {'title': "You Won't Believe This", 'content': 'A' * 250, 'summary': 'Summary', 'category': 'Fiction'}
+
+
+@pytest.fixture
+def author():
+    # An author with five posts, as loaded from the database.
+    now = datetime.now()
+    author = Author(id=1, created_at=now, **AUTHOR)
+    author.posts = [Post(id=n, created_at=now, author_id=1, **POST) for n in range(5)]
+    return author
+
+
+def test_construct_author(benchmark):
+    benchmark(Author, **AUTHOR)
+
+
+def test_construct_post(benchmark):
+    benchmark(Post, **POST)
+
+
+@pytest.mark.parametrize('label', ['valid', 'invalid'])
+@pytest.mark.parametrize('name, validator, key, valid, invalid', [
+    pytest.param(name, validator, key, valid, invalid, id=name)
+    for name, validator, key, _, valid, invalid in CASES
+])
+def test_validator(benchmark, name, validator, key, valid, invalid, label):
+    instance = instance_for(name)
+    value = valid if label == 'valid' else invalid
+
+    def call():
+        try:
+            validator(instance, key, value)
+        except ValueError:
+            pass
+
+    benchmark(call)
+
+
+def test_author_to_dict(benchmark, author):
+    benchmark(author.to_dict)
+
+
+def test_author_to_dict_without_posts(benchmark, author):
+    benchmark(author.to_dict, rules=('-posts',))
+
+
+def test_post_to_dict(benchmark, author):
+    benchmark(author.posts[0].to_dict)
+
+
+def test_post_to_dict_without_author(benchmark, author):
+    benchmark(author.posts[0].to_dict, rules=('-author',))
+
+
+def test_author_repr(benchmark, author):
+    benchmark(repr, author)
+
+
+def test_post_repr(benchmark, author):
+    benchmark(repr, author.posts[0])
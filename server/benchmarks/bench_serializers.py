@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# Compares SerializerMixin.to_dict() with the compiled serializers.
+#
+#   cd server && python -m benchmarks.bench_serializers --rows 100000
+
+import argparse
+import time
+from datetime import datetime
+
+from models import Author, Post
+from serializers import compile_serializer
+
+
+def build_rows(rows, posts_per_author):
+    now = datetime.now()
+    posts = []
+    authors = []
+    for n in range(rows // posts_per_author + 1):
+        author = Author(id=n, name=f'Author {n}', phone_number='1231144321', created_at=now)
+        authors.append(author)
+        for m in range(posts_per_author):
+            if len(posts) == rows:
+                break
+            posts.append(Post(
+                id=len(posts),
+                title=f'Top {m} Secrets',
+                content='A' * 250,
+                category='Fiction',
+                summary='Summary',
+                created_at=now,
+                author=author,
+            ))
+    return authors, posts
+
+
+def best_of(repeat, func, items):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--posts-per-author', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    authors, posts = build_rows(args.rows, args.posts_per_author)
+    cases = (
+        ('Post', posts, compile_serializer(Post)),
+        ('Author', authors, compile_serializer(Author)),
+    )
+
+    print(f"{'model':<8} {'rows':>8} {'to_dict (s)':>12} {'compiled (s)':>13} {'speedup':>8}")
+    for name, items, compiled in cases:
+        assert compiled(items[0]) == items[0].to_dict()
+        baseline = best_of(args.repeat, lambda obj: obj.to_dict(), items)
+        fast = best_of(args.repeat, compiled, items)
+        print(f"{name:<8} {len(items):>8} {baseline:>12.3f} {fast:>13.3f} {baseline / fast:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
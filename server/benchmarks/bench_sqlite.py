@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# Read/write concurrency on a scratch SQLite file for each pragma preset.
+# Writers insert one row per transaction, readers run indexed lookups.
+#
+#   cd server && python -m benchmarks.bench_sqlite --writers 4 --readers 8 --seconds 5
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, insert, select, func
+
+from models import db, Author
+from sqlite_tuning import PRESETS, resolve_pragmas, listen
+
+
+def run(preset, writers, readers, seconds):
+    directory = tempfile.mkdtemp()
+    engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}", pool_size=writers + readers)
+    listen(engine, resolve_pragmas(preset))
+    db.metadata.create_all(engine, tables=[Author.__table__])
+
+    counts = {'writes': 0, 'reads': 0, 'errors': 0}
+    lock = threading.Lock()
+    stop = time.monotonic() + seconds
+
+    def writer(n):
+        done = errors = 0
+        with engine.connect() as connection:
+            while time.monotonic() < stop:
+                try:
+                    with connection.begin():
+                        connection.execute(insert(Author), {'name': f'Writer {n} #{done}', 'phone_number': '1231144321'})
+                    done += 1
+                except Exception:
+                    errors += 1
+        with lock:
+            counts['writes'] += done
+            counts['errors'] += errors
+
+    def reader():
+        done = errors = 0
+        with engine.connect() as connection:
+            while time.monotonic() < stop:
+                try:
+                    top = connection.execute(select(func.max(Author.id))).scalar() or 0
+                    connection.execute(select(Author).where(Author.id == top // 2 + 1)).all()
+                    connection.rollback()
+                    done += 1
+                except Exception:
+                    errors += 1
+        with lock:
+            counts['reads'] += done
+            counts['errors'] += errors
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+    return {key: value / seconds if key != 'errors' else value for key, value in counts.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--presets', nargs='+', default=list(PRESETS))
+    args = parser.parse_args()
+
+    print(f"{'preset':<10} {'writes/s':>10} {'reads/s':>10} {'errors':>7}")
+    for preset in args.presets:
+        result = run(preset, args.writers, args.readers, args.seconds)
+        print(f"{preset:<10} {result['writes']:>10.0f} {result['reads']:>10.0f} {result['errors']:>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# Per-call cost of each @validates hook on valid and invalid input, next to
+# the original (per-call list / uncompiled regex) implementations.
+#
+#   cd server && python -m benchmarks.bench_validators --number 200000
+
+import argparse
+import re
+import timeit
+
+from models import Author, Post
+
+
+def legacy_phone_number(phone_number):
+    if phone_number is None:
+        return phone_number
+    if not re.fullmatch(r'\d{10}', phone_number):
+        raise ValueError
+    return phone_number
+
+
+def legacy_category(category):
+    if category not in ['Fiction', 'Non-Fiction']:
+        raise ValueError
+    return category
+
+
+def legacy_title(title):
+    clickbait_keywords = ["Won't Believe", "Secret", "Top", "Guess"]
+    if not title or not any(keyword in title for keyword in clickbait_keywords):
+        raise ValueError
+    return title
+
+
+def legacy_content(content):
+    if not content or len(content) < 250:
+        raise ValueError
+    return content
+
+
+def legacy_summary(summary):
+    if summary and len(summary) > 250:
+        raise ValueError
+    return summary
+
+
+def legacy_name(name):
+    if not name:
+        raise ValueError
+    return name
+
+
+LONG_TITLE = 'Why I love programming, part ' + 'x' * 200
+# (name, current validator, key, legacy validator, valid input, invalid input)
+CASES = (
+    ('Author.validate_name', Author.validate_name, 'name', legacy_name, 'Jane Author', ''),
+    ('Author.validate_phone_number', Author.validate_phone_number, 'phone_number', legacy_phone_number, '1231144321', '123456789!'),
+    ('Post.validate_content', Post.validate_content, 'content', legacy_content, 'A' * 250, 'A' * 249),
+    ('Post.validate_summary', Post.validate_summary, 'summary', legacy_summary, 'T' * 250, 'T' * 251),
+    ('Post.validate_category', Post.validate_category, 'category', legacy_category, 'Non-Fiction', 'Banana'),
+    ('Post.validate_title', Post.validate_title, 'title', legacy_title, "You Won't Believe This", LONG_TITLE),
+)
+
+
+def instance_for(name):
+    return Author() if name.startswith('Author.') else Post()
+
+
+def per_call(func, number, repeat):
+    def run():
+        try:
+            func()
+        except ValueError:
+            pass
+    return min(timeit.repeat(run, number=number, repeat=repeat)) / number * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--number', type=int, default=200_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'validator':<30} {'input':<8} {'legacy ns':>10} {'current ns':>11} {'speedup':>8}")
+    for name, validator, key, legacy, valid, invalid in CASES:
+        instance = instance_for(name)
+        for label, value in (('valid', valid), ('invalid', invalid)):
+            # @validates leaves the plain function on the class. validate_name
+            # reads self.name, so pass a transient instance.
+            current = per_call(lambda: validator(instance, key, value), args.number, args.repeat)
+            baseline = per_call(lambda: legacy(value), args.number, args.repeat)
+            print(f"{name:<30} {label:<8} {baseline:>10.0f} {current:>11.0f} {baseline / current:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+# bulk.py
+
+from flask import current_app
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Author, Post, NAME_TAKEN_ERROR
+from cache import invalidate_rows
+from name_index import get_index
+from validation import validate_many, first_error
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# Rows per IN (...) lookup; stays below SQLite's bound-parameter limit.
+LOOKUP_CHUNK_SIZE = 500
+
+
+class InvalidBulkRequest(ValueError):
+    pass
+
+
+def parse_rows(request):
+    # A bulk body is either a JSON array of objects or NDJSON (one object
+    # per line, selected by the Content-Type header).
+    if request.mimetype == NDJSON_MIMETYPE:
+        rows = []
+        for line in request.get_data(as_text=True).splitlines():
+            if not line.strip():
+                continue
+            try:
+                rows.append(current_app.json.loads(line))
+            except ValueError:
+                raise InvalidBulkRequest(f"Line {len(rows) + 1} is not valid JSON.")
+    else:
+        rows = request.get_json(silent=True)
+        if not isinstance(rows, list):
+            raise InvalidBulkRequest("Expected a JSON array or an NDJSON body.")
+
+    max_rows = current_app.config.get('BULK_MAX_ROWS')
+    if max_rows and len(rows) > max_rows:
+        raise InvalidBulkRequest(f"A bulk request may contain at most {max_rows} rows.")
+    return rows
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _existing_names(names):
+    existing = set()
+    for chunk in _chunks(names, LOOKUP_CHUNK_SIZE):
+        existing.update(db.session.scalars(select(Author.name).where(Author.name.in_(chunk))))
+    return existing
+
+
+def _ids_by_name(names):
+    ids = {}
+    for chunk in _chunks(names, LOOKUP_CHUNK_SIZE):
+        ids.update(db.session.execute(select(Author.name, Author.id).where(Author.name.in_(chunk))).all())
+    return ids
+
+
+def create_authors(rows):
+    # Validates every row with the Author rules, inserts the valid ones in a
+    # single transaction and returns one result dict per input row.
+    results = [None] * len(rows)
+    valid = []  # (index, values)
+    seen = set()
+
+    mask, errors = validate_many(Author, rows)
+    for index, data in enumerate(rows):
+        if not mask[index]:
+            results[index] = {'index': index, 'error': first_error(errors[index])}
+            continue
+        name = data.get('name')
+        if name in seen:
+            results[index] = {'index': index, 'error': NAME_TAKEN_ERROR}
+            continue
+        seen.add(name)
+        valid.append((index, {'name': name, 'phone_number': data.get('phone_number')}))
+
+    names = [values['name'] for _, values in valid]
+    names_index = get_index()
+    existing = names_index.taken_of(names) if names_index is not None else _existing_names(names)
+    pending = []
+    for index, values in valid:
+        if values['name'] in existing:
+            results[index] = {'index': index, 'error': NAME_TAKEN_ERROR}
+        else:
+            pending.append((index, values))
+
+    if pending:
+        try:
+            db.session.execute(insert(Author), [values for _, values in pending])
+            db.session.commit()
+        except IntegrityError:
+            # A concurrent writer took one of the names between the lookup
+            # and the insert; fall back to one savepoint per row.
+            db.session.rollback()
+            for index in _insert_one_by_one(Author, pending):
+                results[index] = {'index': index, 'error': NAME_TAKEN_ERROR}
+            db.session.commit()
+
+    created = [values['name'] for index, values in pending if results[index] is None]
+    if names_index is not None:
+        # Core inserts bypass the ORM events that keep the index current.
+        names_index.add(created)
+    ids = _ids_by_name(created)
+    for index, values in pending:
+        if results[index] is None:
+            results[index] = {'index': index, 'id': ids.get(values['name'])}
+
+    return results
+
+
+def _insert_one_by_one(model, pending):
+    # Inserts (key, values) pairs under one savepoint each and returns the
+    # keys of the rows that violated a constraint.
+    failed = []
+    for key, values in pending:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(model), [values])
+        except IntegrityError:
+            failed.append(key)
+    return failed
+
+
+def _insert_posts(chunk, errors):
+    # chunk is a list of (line_number, values); returns the number inserted.
+    author_ids = {values['author_id'] for _, values in chunk}
+    known = set(db.session.scalars(select(Author.id).where(Author.id.in_(author_ids))))
+
+    pending = []
+    for line, values in chunk:
+        if values['author_id'] in known:
+            pending.append((line, values))
+        else:
+            errors.append({'line': line, 'error': f"Author with id {values['author_id']} not found."})
+    if not pending:
+        return 0
+
+    try:
+        db.session.execute(insert(Post), [values for _, values in pending])
+        db.session.commit()
+        invalidate_rows(Post, [values for _, values in pending])
+        return len(pending)
+    except IntegrityError:
+        db.session.rollback()
+        failed = _insert_one_by_one(Post, pending)
+        db.session.commit()
+        invalidate_rows(Post, [values for _, values in pending])
+        for line in failed:
+            errors.append({'line': line, 'error': "Failed to create post. Ensure author_id is valid."})
+        return len(pending) - len(failed)
+
+
+def _process_posts(chunk, errors):
+    # chunk is a list of (line_number, row) parsed from the body.
+    mask, row_errors = validate_many(Post, [row for _, row in chunk])
+    valid = []
+    for (line, row), ok, error in zip(chunk, mask, row_errors):
+        if not ok:
+            errors.append({'line': line, 'error': first_error(error)})
+            continue
+        valid.append((line, {
+            'title': row['title'],
+            'content': row['content'],
+            'summary': row.get('summary'),
+            'category': row['category'],
+            'author_id': row['author_id'],
+        }))
+    return _insert_posts(valid, errors) if valid else 0
+
+
+def ingest_posts(lines, chunk_size):
+    # Reads NDJSON lines one at a time (lines may be the raw request stream,
+    # so the body is never held in memory), validates each chunk of
+    # `chunk_size` rows with the Post rules and inserts the valid rows, one
+    # transaction per chunk. Errors are reported by 1-based line number.
+    created = 0
+    errors = []
+    chunk = []
+
+    for line, raw in enumerate(lines, start=1):
+        if not raw.strip():
+            continue
+        try:
+            row = current_app.json.loads(raw)
+        except ValueError:
+            errors.append({'line': line, 'error': "Line is not valid JSON."})
+            continue
+        if not isinstance(row, dict):
+            errors.append({'line': line, 'error': "Row must be a JSON object."})
+            continue
+        author_id = row.get('author_id')
+        if not isinstance(author_id, int) or isinstance(author_id, bool):
+            errors.append({'line': line, 'error': "author_id must be an integer."})
+            continue
+
+        chunk.append((line, row))
+        if len(chunk) >= chunk_size:
+            created += _process_posts(chunk, errors)
+            chunk = []
+
+    if chunk:
+        created += _process_posts(chunk, errors)
+
+    errors.sort(key=lambda error: error['line'])
+    return {'created': created, 'failed': len(errors), 'errors': errors}
+
+
+def summarize(results):
+    failed = sum(1 for result in results if 'error' in result)
+    return {
+        'created': len(results) - failed,
+        'failed': failed,
+        'results': results,
+    }
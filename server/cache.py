@@ -0,0 +1,183 @@
+# cache.py
+#
+# Bounded in-process LRU/TTL cache of serialized response bodies (with
+# their ETag and Last-Modified validators) for the by-id routes. Entries are tagged with the (model, id) pairs their body
+# was built from and dropped whenever one of those rows is inserted,
+# updated or deleted through the ORM.
+
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from models import Author, Post
+
+
+class ResponseCache:
+
+    def __init__(self, max_entries=10_000, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()  # key -> (expires_at, body, tags)
+        self._tags = {}                # tag -> set of keys
+        self._version = 0
+        # Version of each tag's latest invalidation, bounded; reads older
+        # than _floor may have missed a forgotten invalidation.
+        self._tag_versions = OrderedDict()
+        self._floor = 0
+        self._lock = threading.Lock()
+
+    @property
+    def version(self):
+        # Read before querying the database and pass to set(): a body built
+        # from rows that were invalidated in the meantime is not stored.
+        return self._version
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, body, tags, version):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            if version < self._floor or any(self._tag_versions.get(tag, 0) > version for tag in tags):
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, body, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, *tags):
+        with self._lock:
+            self._version += 1
+            for tag in tags:
+                self._tag_versions[tag] = self._version
+                self._tag_versions.move_to_end(tag)
+                for key in self._tags.pop(tag, ()):
+                    self._remove(key)
+                    self.invalidations += 1
+            while len(self._tag_versions) > max(self.max_entries, 1024):
+                _, forgotten = self._tag_versions.popitem(last=False)
+                self._floor = max(self._floor, forgotten)
+
+    def clear(self):
+        with self._lock:
+            self._version += 1
+            self._floor = self._version
+            self._tag_versions.clear()
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._tags.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+            }
+
+    def _remove(self, key):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+def get_cache():
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('response_cache')
+
+
+def tags_for(model, values):
+    # Cache tags affected by a change to one row. A post's body embeds its
+    # author and an author's body embeds their posts, so a post change also
+    # invalidates its author.
+    if model is Post:
+        return [('Post', values.get('id')), ('Author', values.get('author_id'))]
+    return [(model.__name__, values.get('id'))]
+
+
+def invalidate_rows(model, rows):
+    # For writes that bypass the ORM unit of work (Core inserts).
+    cache = get_cache()
+    if cache is not None:
+        tags = {tag for values in rows for tag in tags_for(model, values)}
+        cache.invalidate(*tags)
+
+
+def _on_change(mapper, connection, target):
+    cache = get_cache()
+    if cache is None:
+        return
+    tags = tags_for(type(target), {'id': target.id, 'author_id': getattr(target, 'author_id', None)})
+    if isinstance(target, Post):
+        # A post moved to another author changes the old author's body too.
+        tags += [('Author', old) for old in inspect(target).attrs.author_id.history.deleted]
+    cache.invalidate(*tags)
+    # Invalidate again once the transaction is visible, so a reader that
+    # raced the commit cannot leave a stale body behind.
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('cache_tags', set()).update(tags)
+
+
+for _model in (Author, Post):
+    for _event in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _event, _on_change)
+
+
+@event.listens_for(Session, 'after_commit')
+def _after_commit(session):
+    tags = session.info.pop('cache_tags', None)
+    cache = get_cache()
+    if tags and cache is not None:
+        cache.invalidate(*tags)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop('cache_tags', None)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _on_bulk_statement(orm_execute_state):
+    # Query.delete()/update() touch rows without loading them, so there is
+    # no way to tell which entries are affected.
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        cache = get_cache()
+        if cache is not None:
+            cache.clear()
+
+
+def init_app(app):
+    app.config.setdefault('RESPONSE_CACHE_SIZE', 10_000)
+    app.config.setdefault('RESPONSE_CACHE_TTL', 60)
+    app.extensions['response_cache'] = ResponseCache(
+        max_entries=app.config['RESPONSE_CACHE_SIZE'],
+        ttl=app.config['RESPONSE_CACHE_TTL'],
+    )
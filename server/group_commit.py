@@ -0,0 +1,141 @@
+# group_commit.py
+#
+# Opt-in write-behind group commit (app.config['GROUP_COMMIT'] = True).
+# Create requests validate their row as usual, then hand it to a background
+# committer which inserts everything that arrived within a few milliseconds
+# (or up to a maximum batch size) in one transaction, so concurrent writers
+# share one fsync. Each request still waits for, and gets back, its own
+# primary key or IntegrityError.
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from flask import current_app
+from sqlalchemy import inspect, insert
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Author
+from cache import invalidate_rows
+from name_index import get_index
+
+_STOP = object()
+
+
+class GroupCommitter:
+
+    def __init__(self, app, max_batch=64, max_delay=0.005):
+        self.app = app
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, model, values):
+        future = Future()
+        self._ensure_started()
+        self.queue.put((model, values, future))
+        return future
+
+    def stop(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self.queue.put(_STOP)
+            thread.join()
+
+    def _ensure_started(self):
+        # Started lazily so that forking servers get one committer per worker.
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='group-commit', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        with self.app.app_context():
+            engine = db.engine
+
+        stopping = False
+        while not stopping:
+            item = self.queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._commit(engine, batch)
+
+    def _commit(self, engine, batch):
+        # SQLite rolls back only the failing statement on a constraint
+        # violation, so one bad row does not take the rest of the group down.
+        outcomes = []
+        try:
+            with engine.begin() as connection:
+                for model, values, future in batch:
+                    try:
+                        result = connection.execute(insert(model), values)
+                        outcomes.append((future, result.inserted_primary_key[0], None))
+                    except IntegrityError as e:
+                        outcomes.append((future, None, e))
+        except Exception as e:
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+
+        for future, id, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(id)
+
+
+def init_app(app):
+    app.config.setdefault('GROUP_COMMIT', False)
+    app.config.setdefault('GROUP_COMMIT_MAX_BATCH', 64)
+    app.config.setdefault('GROUP_COMMIT_MAX_DELAY_MS', 5)
+    app.config.setdefault('GROUP_COMMIT_TIMEOUT', 10)
+    app.extensions['group_commit'] = GroupCommitter(
+        app,
+        max_batch=app.config['GROUP_COMMIT_MAX_BATCH'],
+        max_delay=app.config['GROUP_COMMIT_MAX_DELAY_MS'] / 1000,
+    )
+
+
+def save(instance):
+    # Persists a new, already validated model instance and returns the
+    # instance to serialize. Without group commit this is add() + commit().
+    if not current_app.config.get('GROUP_COMMIT'):
+        db.session.add(instance)
+        db.session.commit()
+        return instance
+
+    model = type(instance)
+    values = {
+        attr.key: instance.__dict__[attr.key]
+        for attr in inspect(model).column_attrs
+        if attr.key in instance.__dict__
+    }
+    committer = current_app.extensions['group_commit']
+    id = committer.submit(model, values).result(timeout=current_app.config['GROUP_COMMIT_TIMEOUT'])
+    # Core inserts do not fire the ORM events that keep the cache and the
+    # name index current.
+    invalidate_rows(model, [dict(values, id=id)])
+    names_index = get_index()
+    if model is Author and names_index is not None:
+        names_index.add([values['name']])
+    return db.session.get(model, id)
@@ -0,0 +1,172 @@
+# instrumentation.py
+#
+# Per-request SQL and timing instrumentation. For every request it records
+# the number of statements run, the time spent in the database and in
+# serialization, and the total latency. The figures are sent back as a
+# Server-Timing header:
+#
+#   Server-Timing: db;dur=1.82;desc="3 queries", serialize;dur=0.41, total;dur=3.05
+#
+# and aggregated into per-route histograms, served by GET /timings.
+#
+#   app.config['INSTRUMENTATION'] = False   # no hooks at all
+#   app.config['SERVER_TIMING'] = False     # keep the histograms, drop the header
+#
+# Latency stops at after_request: queries run while a streamed body is being
+# written are not counted.
+
+import bisect
+import contextlib
+import threading
+import time
+
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event
+
+# Upper bounds of the histogram buckets; the last bucket is unbounded.
+MILLISECOND_BUCKETS = (0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self):
+        buckets = {str(bound): count for bound, count in zip(self.bounds, self.counts)}
+        buckets['+Inf'] = self.counts[-1]
+        return {'count': self.count, 'sum': round(self.sum, 3), 'buckets': buckets}
+
+
+class RouteTimings:
+    # Histograms for one "METHOD /rule" key.
+
+    def __init__(self):
+        self.latency_ms = Histogram(MILLISECOND_BUCKETS)
+        self.db_ms = Histogram(MILLISECOND_BUCKETS)
+        self.serialize_ms = Histogram(MILLISECOND_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+
+    def snapshot(self):
+        return {name: histogram.snapshot() for name, histogram in vars(self).items()}
+
+
+class Timings:
+
+    def __init__(self):
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def record(self, route, timings):
+        with self._lock:
+            stats = self._routes.get(route)
+            if stats is None:
+                stats = self._routes[route] = RouteTimings()
+            stats.latency_ms.observe(timings['total'])
+            stats.db_ms.observe(timings['db'])
+            stats.serialize_ms.observe(timings['serialize'])
+            stats.queries.observe(timings['queries'])
+
+    def snapshot(self):
+        with self._lock:
+            return {route: stats.snapshot() for route, stats in sorted(self._routes.items())}
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+
+def _current():
+    # Timings of the request being handled, if it is instrumented.
+    if not has_app_context():
+        return None
+    return g.get('_timings')
+
+
+@contextlib.contextmanager
+def timed(name):
+    # Adds the wrapped block's duration (ms) to the current request's `name`.
+    timings = _current()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0) + (time.perf_counter() - started) * 1000
+
+
+def route_rule():
+    return request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+
+
+def route_key():
+    return f'{request.method} {route_rule()}'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current() is not None:
+        conn.info['_query_started'] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timings = _current()
+    started = conn.info.pop('_query_started', None)
+    if timings is None or started is None:
+        return
+    timings['db'] += (time.perf_counter() - started) * 1000
+    timings['queries'] += 1
+
+
+def _before_request():
+    g._timings = {'started': time.perf_counter(), 'db': 0, 'queries': 0, 'serialize': 0}
+
+
+def finish():
+    # The current request's timings with 'total' set, or None. The first call
+    # stops the clock, so every after_request consumer (this module's and
+    # metrics.py's, whichever runs first) reports the same latency.
+    timings = _current()
+    if timings is not None and 'total' not in timings:
+        timings['total'] = (time.perf_counter() - timings['started']) * 1000
+    return timings
+
+
+def _after_request(response):
+    timings = finish()
+    if timings is None:
+        return response
+    g.pop('_timings')
+    current_app.extensions['timings'].record(route_key(), timings)
+    if current_app.config['SERVER_TIMING']:
+        response.headers.add('Server-Timing', ', '.join((
+            f'db;dur={timings["db"]:.2f};desc="{timings["queries"]} queries"',
+            f'serialize;dur={timings["serialize"]:.2f}',
+            f'total;dur={timings["total"]:.2f}',
+        )))
+    return response
+
+
+def init_app(app, db):
+    app.config.setdefault('INSTRUMENTATION', True)
+    app.config.setdefault('SERVER_TIMING', True)
+    if not app.config['INSTRUMENTATION']:
+        return
+    app.extensions['timings'] = Timings()
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
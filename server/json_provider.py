@@ -0,0 +1,81 @@
+# json_provider.py
+#
+# Flask JSON provider that encodes with orjson when it is installed and
+# falls back to the stdlib json module otherwise. Responses are compact
+# unless app.json.compact is False; None (the default) pretty-prints only
+# while the app runs in debug mode.
+
+import json
+from datetime import date, datetime, time
+
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy_serializer import SerializerMixin
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def _default(value):
+    # Datetimes use the same formats as SerializerMixin.to_dict() so a value
+    # reads the same whether or not it was pre-formatted by a serializer.
+    if isinstance(value, datetime):
+        return value.strftime(SerializerMixin.datetime_format)
+    if isinstance(value, date):
+        return value.strftime(SerializerMixin.date_format)
+    if isinstance(value, time):
+        return value.strftime(SerializerMixin.time_format)
+    return DefaultJSONProvider.default(value)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    backend = 'orjson' if orjson is not None else 'json'
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and not kwargs:
+            return self._orjson_dumps(obj, 0).decode()
+        kwargs.setdefault('default', _default)
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        kwargs.setdefault('separators', (',', ':'))
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def _orjson_dumps(self, obj, option):
+        # Datetimes are passed through to _default so their format matches
+        # the stdlib path instead of orjson's RFC 3339 output.
+        option |= orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=_default, option=option)
+
+    def _is_compact(self):
+        if self.compact is None:
+            return not self._app.debug
+        return self.compact
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        compact = self._is_compact()
+        if orjson is not None:
+            body = self._orjson_dumps(obj, 0 if compact else orjson.OPT_INDENT_2)
+            return self._app.response_class(body + b'\n', mimetype=self.mimetype)
+
+        dump_args = {'separators': (',', ':')}
+        if not compact:
+            dump_args = {'indent': 2, 'separators': (',', ': ')}
+        return self._app.response_class(
+            f'{self.dumps(obj, **dump_args)}\n', mimetype=self.mimetype
+        )
+
+
+def init_app(app):
+    app.json_provider_class = FastJSONProvider
+    app.json = FastJSONProvider(app)
+    # True/False forces compact or pretty output; None follows app.debug.
+    app.json.compact = app.config.get('JSON_COMPACT')
@@ -0,0 +1,219 @@
+# metrics.py
+#
+# Prometheus text-format metrics, served by GET /metrics:
+#
+#   http_requests_total{method,route,status}         counter
+#   http_request_duration_seconds{method,route}      histogram
+#   http_response_size_bytes{method,route}           histogram (non-streamed bodies)
+#   validation_failures_total{validator}             counter, e.g. validator="validate_title"
+#   db_integrity_errors_total                        counter
+#   db_pool_size / _checked_out / _checked_in / _overflow   gauges, read at scrape time
+#
+# Recording is lock-free: every thread writes to its own shard, and a scrape
+# sums the shards. A thread's shard is folded into a shared one when the
+# thread exits, so a thread-per-request server does not grow without bound.
+#
+#   app.config['METRICS'] = False   # no hooks and no /metrics route data
+#
+# Request durations are instrumentation.py's per-request totals, the same
+# figures /timings and Server-Timing report; with INSTRUMENTATION off only
+# the counters and sizes are recorded.
+
+import bisect
+import threading
+import weakref
+
+from flask import current_app, request
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+
+import instrumentation
+from models import (
+    NAME_ERROR, NAME_TAKEN_ERROR, PHONE_NUMBER_ERROR, CONTENT_ERROR, SUMMARY_ERROR, CATEGORY_ERROR, TITLE_ERROR,
+)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BYTES_BUCKETS = (100, 1000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+# name -> (type, help, histogram buckets)
+METRICS = {
+    'http_requests_total': ('counter', 'Requests handled.', None),
+    'http_request_duration_seconds': ('histogram', 'Time from before_request to after_request (instrumentation.py).', SECONDS_BUCKETS),
+    'http_response_size_bytes': ('histogram', 'Size of non-streamed response bodies.', BYTES_BUCKETS),
+    'validation_failures_total': ('counter', 'Rejected values, by model validator.', None),
+    'db_integrity_errors_total': ('counter', 'Statements that failed with an IntegrityError.', None),
+}
+
+# Every validator raises its own message, which also reaches bulk results.
+VALIDATORS = {
+    NAME_ERROR: 'validate_name',
+    NAME_TAKEN_ERROR: 'validate_name',
+    PHONE_NUMBER_ERROR: 'validate_phone_number',
+    CONTENT_ERROR: 'validate_content',
+    SUMMARY_ERROR: 'validate_summary',
+    CATEGORY_ERROR: 'validate_category',
+    TITLE_ERROR: 'validate_title',
+}
+
+
+class _Shard:
+
+    def __init__(self):
+        self.counters = {}    # (name, labels) -> value
+        self.histograms = {}  # (name, labels) -> [bucket counts..., +Inf count, sum]
+
+    def merge(self, other):
+        for key, value in other.counters.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+        for key, values in other.histograms.items():
+            mine = self.histograms.get(key)
+            if mine is None:
+                self.histograms[key] = list(values)
+            else:
+                for index, value in enumerate(values):
+                    mine[index] += value
+
+
+class Registry:
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = set()
+        self._retired = _Shard()
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                self._shards.add(shard)
+            weakref.finalize(threading.current_thread(), self._retire, shard)
+        return shard
+
+    def _retire(self, shard):
+        with self._lock:
+            self._shards.discard(shard)
+            self._retired.merge(shard)
+
+    def inc(self, name, labels=(), amount=1):
+        counters = self._shard().counters
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        histograms = self._shard().histograms
+        key = (name, labels)
+        buckets = METRICS[name][2]
+        values = histograms.get(key)
+        if values is None:
+            values = histograms[key] = [0] * (len(buckets) + 2)
+        values[bisect.bisect_left(buckets, value)] += 1
+        values[-1] += value
+
+    def collect(self):
+        # One shard holding the sum of every thread's shard.
+        total = _Shard()
+        with self._lock:
+            total.merge(self._retired)
+            for shard in list(self._shards):
+                # Copies first: the owning thread may be adding keys.
+                copy = _Shard()
+                copy.counters = dict(shard.counters)
+                copy.histograms = {key: list(values) for key, values in list(shard.histograms.items())}
+                total.merge(copy)
+        return total
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in pairs
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def _pool_gauges(engine):
+    pool = engine.pool
+    for name in ('size', 'checkedout', 'checkedin', 'overflow'):
+        method = getattr(pool, name, None)
+        if method is not None:
+            yield f"db_pool_{name.replace('checked', 'checked_')}", method()
+
+
+def render(registry, engine=None):
+    # The registry (and pool state) in the Prometheus text exposition format.
+    total = registry.collect()
+    lines = []
+    for name, (kind, help, buckets) in METRICS.items():
+        lines.append(f'# HELP {name} {help}')
+        lines.append(f'# TYPE {name} {kind}')
+        if kind == 'counter':
+            for (metric, labels), value in sorted(total.counters.items()):
+                if metric == name:
+                    lines.append(f'{name}{_labels(labels)} {value}')
+            continue
+        for (metric, labels), values in sorted(total.histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets + ('+Inf',), values):
+                cumulative += count
+                lines.append(f'{name}_bucket{_labels(labels + (("le", bound),))} {cumulative}')
+            lines.append(f'{name}_sum{_labels(labels)} {values[-1]}')
+            lines.append(f'{name}_count{_labels(labels)} {cumulative}')
+
+    if engine is not None:
+        for name, value in _pool_gauges(engine):
+            lines.append(f'# TYPE {name} gauge')
+            lines.append(f'{name} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def get_registry():
+    return current_app.extensions.get('metrics')
+
+
+def count_validation_failures(messages):
+    # Counts validator error messages, from a caught ValueError or bulk results.
+    registry = get_registry()
+    if registry is None:
+        return
+    for message in messages:
+        validator = VALIDATORS.get(str(message))
+        if validator is not None:
+            registry.inc('validation_failures_total', (('validator', validator),))
+
+
+def _after_request(response):
+    registry = get_registry()
+    if registry is None:
+        return response
+    labels = (('method', request.method), ('route', instrumentation.route_rule()))
+    registry.inc('http_requests_total', labels + (('status', response.status_code),))
+    timings = instrumentation.finish()
+    if timings is not None:
+        registry.observe('http_request_duration_seconds', labels, timings['total'] / 1000)
+    if not response.is_streamed:
+        registry.observe('http_response_size_bytes', labels, response.calculate_content_length() or 0)
+    return response
+
+
+def init_app(app, db):
+    app.config.setdefault('METRICS', True)
+    if not app.config['METRICS']:
+        return
+    registry = app.extensions['metrics'] = Registry()
+    app.after_request(_after_request)
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, 'handle_error')
+    def count_integrity_errors(context):
+        if isinstance(context.sqlalchemy_exception, IntegrityError):
+            registry.inc('db_integrity_errors_total')
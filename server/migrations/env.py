@@ -81,8 +81,20 @@ def run_migrations_online():
             **current_app.extensions['migrate'].configure_args
         )
 
-        with context.begin_transaction():
-            context.run_migrations()
+        # The serving presets turn foreign_keys on; batch migrations copy and
+        # drop tables, which that would reject. The PRAGMA is a no-op inside
+        # a transaction, so it goes straight to the driver connection.
+        sqlite = connection.dialect.name == 'sqlite'
+        if sqlite:
+            driver_connection = connection.connection.driver_connection
+            foreign_keys = driver_connection.execute('PRAGMA foreign_keys').fetchone()[0]
+            driver_connection.execute('PRAGMA foreign_keys=OFF')
+        try:
+            with context.begin_transaction():
+                context.run_migrations()
+        finally:
+            if sqlite:
+                driver_connection.execute(f'PRAGMA foreign_keys={foreign_keys}')
 
 
 if context.is_offline_mode():
@@ -0,0 +1,32 @@
+"""add posts.author_id with foreign key
+
+Revision ID: b7e3d91c4a52
+Revises: faa482c1e292
+Create Date: 2026-10-16 09:12:31.402118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e3d91c4a52'
+down_revision = 'faa482c1e292'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # SQLite cannot ALTER a table to add a constraint, so the table is
+    # rebuilt in batch mode. The initial schema had no author_id, so no
+    # existing post can have been written through the Post model; the
+    # column is added as NOT NULL to match it.
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('author_id', sa.Integer(), nullable=False))
+        batch_op.create_foreign_key('fk_posts_author_id_authors', 'authors', ['author_id'], ['id'])
+
+
+def downgrade():
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_posts_author_id_authors', type_='foreignkey')
+        batch_op.drop_column('author_id')
@@ -1,32 +1,69 @@
+from flask import current_app, has_app_context
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.orm import validates
 from sqlalchemy_serializer import SerializerMixin # Import SerializerMixin
 import re # Import regex for phone number validation
 
 db = SQLAlchemy()
 
+# Validation rules, compiled once at import instead of on every assignment.
+PHONE_NUMBER_PATTERN = re.compile(r'\d{10}') # exactly ten digits
+CONTENT_MIN_LENGTH = 250
+SUMMARY_MAX_LENGTH = 250
+CATEGORIES = frozenset(('Fiction', 'Non-Fiction'))
+CLICKBAIT_KEYWORDS = ("Won't Believe", "Secret", "Top", "Guess")
+# One alternation scans the title once, instead of once per keyword.
+CLICKBAIT_PATTERN = re.compile('|'.join(re.escape(keyword) for keyword in CLICKBAIT_KEYWORDS))
+
+# Timestamps as SQLite's CURRENT_TIMESTAMP stores them ('YYYY-MM-DD HH:MM:SS').
+# SQLite compares DATETIME values as text, so a bound datetime must render
+# exactly like the stored values for keyset cursors to match them.
+TIMESTAMP = db.DateTime().with_variant(
+    sqlite.DATETIME(storage_format='%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d'),
+    'sqlite',
+)
+
+NAME_ERROR = "Author must have a name."
+NAME_TAKEN_ERROR = "Author with this name already exists."
+PHONE_NUMBER_ERROR = "Phone number must be exactly ten digits."
+CONTENT_ERROR = "Post content must be at least 250 characters long."
+SUMMARY_ERROR = "Post summary cannot exceed 250 characters."
+CATEGORY_ERROR = "Post category must be 'Fiction' or 'Non-Fiction'."
+TITLE_ERROR = "Post title must contain one of: 'Won't Believe', 'Secret', 'Top', 'Guess'."
+
+def name_is_taken(name):
+    # Consults the app's in-memory name index (see name_index.py), if any.
+    index = current_app.extensions.get('name_index') if has_app_context() else None
+    return index is not None and index.is_taken(name)
+
 class Author(db.Model, SerializerMixin): # Add SerializerMixin
     __tablename__ = 'authors'
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String, unique=True, nullable=False) # All authors have a name, No two authors have the same name.
     phone_number = db.Column(db.String) # Author phone numbers are exactly ten digits.
-    created_at = db.Column(db.DateTime, server_default=db.func.now())
+    created_at = db.Column(TIMESTAMP, server_default=db.func.now(), index=True) # Indexed for ?sort=created_at keyset pages
     updated_at = db.Column(db.DateTime, onupdate=db.func.now())
+    # Bumped by every UPDATE (updated_at only has one-second precision); ETags hash it
+    version_id = db.Column(db.Integer, nullable=False, server_default='1', onupdate=db.literal_column('version_id') + 1)
 
     # Define a one-to-many relationship with Post
     posts = db.relationship('Post', backref='author', lazy=True, cascade='all, delete-orphan')
 
     # Serialization rules to avoid circular references if needed
-    serialize_rules = ('-posts.author',)
+    serialize_rules = ('-posts.author', '-version_id')
 
     # Add validators 
     @validates('name')
     def validate_name(self, key, name):
         # All authors have a name (already handled by nullable=False)
-        # No two authors have the same name (already handled by unique=True)
         if not name:
-            raise ValueError("Author must have a name.")
+            raise ValueError(NAME_ERROR)
+        # No two authors have the same name: rejected here without an INSERT
+        # round trip; unique=True still guarantees it in the database.
+        if name != self.name and name_is_taken(name):
+            raise ValueError(NAME_TAKEN_ERROR)
         return name
 
     @validates('phone_number')
@@ -34,9 +71,9 @@ class Author(db.Model, SerializerMixin): # Add SerializerMixin
         # Author phone numbers are exactly ten digits.
         if phone_number is None: # Allow phone_number to be None if it's not required
             return phone_number
-        # Use regex to check for exactly 10 digits
-        if not re.fullmatch(r'\d{10}', phone_number):
-            raise ValueError("Phone number must be exactly ten digits.")
+        # Use the precompiled regex to check for exactly 10 digits
+        if not isinstance(phone_number, str) or not PHONE_NUMBER_PATTERN.fullmatch(phone_number):
+            raise ValueError(PHONE_NUMBER_ERROR)
         return phone_number
 
     def __repr__(self):
@@ -50,44 +87,51 @@ class Post(db.Model, SerializerMixin): # Add SerializerMixin
     content = db.Column(db.String) # Post content is at least 250 characters long.
     category = db.Column(db.String) # Post category is either Fiction or Non-Fiction.
     summary = db.Column(db.String) # Post summary is a maximum of 250 characters.
-    created_at = db.Column(db.DateTime, server_default=db.func.now())
+    created_at = db.Column(TIMESTAMP, server_default=db.func.now(), index=True) # Indexed for ?sort=created_at keyset pages
     updated_at = db.Column(db.DateTime, onupdate=db.func.now())
+    # Bumped by every UPDATE (updated_at only has one-second precision); ETags hash it
+    version_id = db.Column(db.Integer, nullable=False, server_default='1', onupdate=db.literal_column('version_id') + 1)
 
     # Define a many-to-one relationship with Author
-    author_id = db.Column(db.Integer, db.ForeignKey('authors.id'), nullable=False)
+    author_id = db.Column(db.Integer, db.ForeignKey('authors.id', name='fk_posts_author_id_authors'), nullable=False)
+
+    # (author_id, created_at) also serves plain author_id lookups and the FK
+    __table_args__ = (
+        db.Index('ix_posts_author_id_created_at', 'author_id', 'created_at'),
+        db.Index('ix_posts_category_created_at', 'category', 'created_at'),
+    )
 
     # Serialization rules
-    serialize_rules = ('-author.posts',)
+    serialize_rules = ('-author.posts', '-version_id')
 
     # Add validators 
     @validates('content')
     def validate_content(self, key, content):
         # Post content is at least 250 characters long.
-        if not content or len(content) < 250:
-            raise ValueError("Post content must be at least 250 characters long.")
+        if not isinstance(content, str) or len(content) < CONTENT_MIN_LENGTH:
+            raise ValueError(CONTENT_ERROR)
         return content
 
     @validates('summary')
     def validate_summary(self, key, summary):
         # Post summary is a maximum of 250 characters.
-        if summary and len(summary) > 250:
-            raise ValueError("Post summary cannot exceed 250 characters.")
+        if summary and (not isinstance(summary, str) or len(summary) > SUMMARY_MAX_LENGTH):
+            raise ValueError(SUMMARY_ERROR)
         return summary
 
     @validates('category')
     def validate_category(self, key, category):
         # Post category is either Fiction or Non-Fiction.
-        if category not in ['Fiction', 'Non-Fiction']:
-            raise ValueError("Post category must be 'Fiction' or 'Non-Fiction'.")
+        if not isinstance(category, str) or category not in CATEGORIES:
+            raise ValueError(CATEGORY_ERROR)
         return category
 
     @validates('title')
     def validate_title(self, key, title):
         # Post title is sufficiently clickbait-y and must contain one of the following:
         # "Won't Believe", "Secret", "Top", "Guess"
-        clickbait_keywords = ["Won't Believe", "Secret", "Top", "Guess"]
-        if not any(keyword in title for keyword in clickbait_keywords):
-            raise ValueError("Post title must contain one of: 'Won't Believe', 'Secret', 'Top', 'Guess'.")
+        if not isinstance(title, str) or not CLICKBAIT_PATTERN.search(title):
+            raise ValueError(TITLE_ERROR)
         return title
 
     def __repr__(self):
@@ -0,0 +1,180 @@
+# name_index.py
+#
+# In-memory index of author names, so duplicate names are caught in
+# Author.validate_name instead of by a failed INSERT and a rollback.
+#
+# The index only ever answers "maybe taken": a hit is confirmed with one
+# indexed SELECT (which also covers rows deleted by another worker process,
+# and Bloom filter false positives), and a miss goes straight to the INSERT,
+# where the UNIQUE constraint stays the source of truth.
+#
+#   app.config['NAME_INDEX'] = 'set'    # exact hash set (default)
+#   app.config['NAME_INDEX'] = 'bloom'  # fixed-size Bloom filter for huge tables
+#   app.config['NAME_INDEX'] = None     # disabled
+#
+# The index is filled on first use, not by create_app(): importing app.py
+# (scripts, tests, every worker) must not scan the authors table.
+
+import hashlib
+import math
+import threading
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, object_session
+
+from models import db, Author
+
+
+class BloomFilter:
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, name):
+        digest = hashlib.blake2b(name.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, name):
+        for position in self._positions(name):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def discard(self, name):
+        # Bloom filters cannot forget; the confirming SELECT handles it.
+        pass
+
+    def __contains__(self, name):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(name))
+
+
+class NameIndex:
+
+    def __init__(self, kind='set', bloom_capacity=10_000_000):
+        self.kind = kind
+        self.bloom_capacity = bloom_capacity
+        self.hits = 0
+        self.confirmed = 0
+        self._names = None  # None until warmed, or after a bulk change
+        self._lock = threading.Lock()
+
+    def _empty(self):
+        return BloomFilter(self.bloom_capacity) if self.kind == 'bloom' else set()
+
+    def warm(self):
+        names = self._empty()
+        # May run from a validator, with the instance being built not yet flushable.
+        with db.session.no_autoflush:
+            result = db.session.execute(select(Author.name).execution_options(yield_per=10_000))
+            for name in result.scalars():
+                names.add(name)
+        with self._lock:
+            self._names = names
+
+    def invalidate(self):
+        with self._lock:
+            self._names = None
+
+    def add(self, names):
+        with self._lock:
+            if self._names is not None:
+                for name in names:
+                    self._names.add(name)
+
+    def discard(self, names):
+        with self._lock:
+            if self._names is not None:
+                for name in names:
+                    self._names.discard(name)
+
+    def is_taken(self, name):
+        if self._names is None:
+            self.warm()
+        if name not in self._names:
+            return False
+        self.hits += 1
+        with db.session.no_autoflush:
+            taken = db.session.execute(select(Author.id).where(Author.name == name).limit(1)).first() is not None
+        if taken:
+            self.confirmed += 1
+        return taken
+
+    def taken_of(self, names):
+        # Subset of `names` already in the database; only index hits are looked up.
+        if self._names is None:
+            self.warm()
+        candidates = [name for name in names if name in self._names]
+        taken = set()
+        for start in range(0, len(candidates), 500):
+            chunk = candidates[start:start + 500]
+            taken.update(db.session.scalars(select(Author.name).where(Author.name.in_(chunk))))
+        return taken
+
+
+def get_index():
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('name_index')
+
+
+# Changes are staged per session and applied once the transaction commits,
+# so a rolled back INSERT never leaves a phantom name behind.
+
+def _stage(target, added=(), removed=()):
+    session = object_session(target)
+    if session is None or get_index() is None:
+        return
+    staged = session.info.setdefault('name_index', {'added': set(), 'removed': set()})
+    staged['added'].update(added)
+    staged['removed'].update(removed)
+
+
+@event.listens_for(Author, 'after_insert')
+def _after_insert(mapper, connection, target):
+    _stage(target, added=[target.name])
+
+
+@event.listens_for(Author, 'after_update')
+def _after_update(mapper, connection, target):
+    history = inspect(target).attrs.name.history
+    if history.has_changes():
+        _stage(target, added=history.added, removed=history.deleted)
+
+
+@event.listens_for(Author, 'after_delete')
+def _after_delete(mapper, connection, target):
+    _stage(target, removed=[target.name])
+
+
+@event.listens_for(Session, 'after_commit')
+def _after_commit(session):
+    staged = session.info.pop('name_index', None)
+    index = get_index()
+    if staged and index is not None:
+        index.discard(staged['removed'] - staged['added'])
+        index.add(staged['added'])
+
+
+@event.listens_for(Session, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop('name_index', None)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _on_bulk_statement(orm_execute_state):
+    # Query.delete()/update() on authors: reload lazily on next use.
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and orm_execute_state.bind_mapper is inspect(Author):
+        index = get_index()
+        if index is not None:
+            index.invalidate()
+
+
+def init_app(app):
+    app.config.setdefault('NAME_INDEX', 'set')
+    app.config.setdefault('NAME_INDEX_BLOOM_CAPACITY', 10_000_000)
+    if not app.config['NAME_INDEX']:
+        return
+    app.extensions['name_index'] = NameIndex(app.config['NAME_INDEX'], app.config['NAME_INDEX_BLOOM_CAPACITY'])
@@ -0,0 +1,96 @@
+# pagination.py
+
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+
+# Sort keys a client may ask for. Every ordering ends on the primary key so
+# that the keyset is unique and each page is a range scan on an index.
+SORT_KEYS = ('id', 'created_at')
+
+
+class InvalidPageRequest(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode()
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidPageRequest("Invalid pagination cursor.")
+    if not isinstance(values, dict) or 'id' not in values:
+        raise InvalidPageRequest("Invalid pagination cursor.")
+    # The id is bound straight into the keyset query.
+    if not isinstance(values['id'], int) or isinstance(values['id'], bool):
+        raise InvalidPageRequest("Invalid pagination cursor.")
+    return values
+
+
+def parse_page_args(args, default_sort='id'):
+    # Reads ?after=<cursor>&limit=N&sort=[-]key from the request args.
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    except (TypeError, ValueError):
+        raise InvalidPageRequest("limit must be an integer.")
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise InvalidPageRequest(f"limit must be between 1 and {MAX_PAGE_SIZE}.")
+
+    sort = args.get('sort', default_sort)
+    if sort.lstrip('-') not in SORT_KEYS:
+        raise InvalidPageRequest(f"sort must be one of: {', '.join(SORT_KEYS)} (prefix with '-' for descending).")
+
+    after = args.get('after')
+    cursor = decode_cursor(after) if after else None
+    if cursor is not None and cursor.get('sort', 'id') != sort:
+        raise InvalidPageRequest("Cursor does not match the requested sort order.")
+
+    return cursor, limit, sort
+
+
+def keyset_page(query, model, cursor=None, limit=DEFAULT_PAGE_SIZE, sort='id'):
+    # Returns (rows, next_cursor). One extra row is fetched to tell whether
+    # another page exists, so no COUNT(*) is ever issued.
+    descending = sort.startswith('-')
+    key = sort.lstrip('-')
+    pk = model.id
+
+    if key == 'id':
+        order = (pk.desc(),) if descending else (pk.asc(),)
+        if cursor is not None:
+            query = query.filter(pk < cursor['id'] if descending else pk > cursor['id'])
+    else:
+        column = getattr(model, key)
+        order = (column.desc(), pk.desc()) if descending else (column.asc(), pk.asc())
+        if cursor is not None:
+            try:
+                value = datetime.fromisoformat(cursor[key])
+            except (KeyError, TypeError, ValueError):
+                raise InvalidPageRequest("Invalid pagination cursor.")
+            if descending:
+                query = query.filter(or_(column < value, and_(column == value, pk < cursor['id'])))
+            else:
+                query = query.filter(or_(column > value, and_(column == value, pk > cursor['id'])))
+
+    rows = query.order_by(*order).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    values = {'id': last.id, 'sort': sort}
+    if key != 'id':
+        value = getattr(last, key)
+        values[key] = value.isoformat() if value is not None else None
+    return rows, encode_cursor(values)
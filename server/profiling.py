@@ -0,0 +1,187 @@
+# profiling.py
+#
+# WSGI middleware that profiles individual requests and writes one file per
+# profiled request to PROFILING_DIR. The response names it in X-Profile-File.
+#
+#   cprofile    - deterministic cProfile, written as .pstats
+#                 (python -m pstats, snakeviz)
+#   speedscope  - sampling profiler, written as .speedscope.json
+#                 (https://www.speedscope.app)
+#   collapsed   - sampling profiler, written as .folded stacks
+#                 (flamegraph.pl, speedscope)
+#
+# A request is profiled when:
+#   app.config['PROFILING'] = 'speedscope'       # every request (development)
+# or when PROFILING_SECRET is set and the request carries a signed header:
+#   X-Profile: <kind>:<expires unix time>:<sign(secret, kind, expires, method, path)>
+#
+# Requests without either pay a single config lookup.
+
+import cProfile
+import hashlib
+import hmac
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from werkzeug.wsgi import ClosingIterator
+
+KINDS = {'cprofile': '.pstats', 'speedscope': '.speedscope.json', 'collapsed': '.folded'}
+
+
+def sign(secret, kind, expires, method, path):
+    message = f'{kind}:{expires}:{method} {path}'.encode()
+    return hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+
+def header_value(secret, kind, method, path, ttl=300):
+    # An X-Profile header value for one request, valid for `ttl` seconds.
+    expires = int(time.time()) + ttl
+    return f'{kind}:{expires}:{sign(secret, kind, expires, method, path)}'
+
+
+def requested_kind(header, secret, method, path):
+    # The profile kind a signed X-Profile header asks for, or None.
+    try:
+        kind, expires, signature = header.split(':')
+        expired = int(expires) < time.time()
+    except ValueError:
+        return None
+    if kind not in KINDS or expired:
+        return None
+    if not hmac.compare_digest(signature, sign(secret, kind, expires, method, path)):
+        return None
+    return kind
+
+
+class Sampler:
+    # Records the stack of one thread every `interval` seconds from a
+    # background thread, using sys._current_frames().
+
+    def __init__(self, thread_id, interval=0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()  # root-to-leaf tuple of (name, file, line) -> samples
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profiling-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            if stack:
+                self.stacks[tuple(reversed(stack))] += 1
+
+    def collapsed(self):
+        lines = (
+            ';'.join(f'{name} ({file}:{line})' for name, file, line in stack) + f' {count}'
+            for stack, count in self.stacks.most_common()
+        )
+        return '\n'.join(lines) + '\n'
+
+    def speedscope(self, name):
+        frames, index = [], {}
+        samples, weights = [], []
+        for stack, count in self.stacks.items():
+            sample = []
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    frames.append({'name': frame[0], 'file': frame[1], 'line': frame[2]})
+                sample.append(index[frame])
+            samples.append(sample)
+            weights.append(count * self.interval)
+        return json.dumps({
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'shared': {'frames': frames},
+            'profiles': [{
+                'type': 'sampled',
+                'name': name,
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': sum(weights),
+                'samples': samples,
+                'weights': weights,
+            }],
+            'name': name,
+            'exporter': 'profiling.py',
+        })
+
+
+class ProfilerMiddleware:
+
+    def __init__(self, app):
+        self.app = app
+        self.wsgi_app = app.wsgi_app
+
+    def __call__(self, environ, start_response):
+        config = self.app.config
+        kind = config['PROFILING']
+        header = environ.get('HTTP_X_PROFILE')
+        if header and config['PROFILING_SECRET']:
+            kind = requested_kind(header, config['PROFILING_SECRET'], environ['REQUEST_METHOD'], environ.get('PATH_INFO', '/')) or kind
+        if not kind:
+            return self.wsgi_app(environ, start_response)
+        return self._profile(kind, environ, start_response)
+
+    def _profile(self, kind, environ, start_response):
+        config = self.app.config
+        name = '{:.6f}-{}-{}'.format(
+            time.time(), environ['REQUEST_METHOD'], re.sub(r'[^A-Za-z0-9]+', '_', environ.get('PATH_INFO', '/')).strip('_') or 'root',
+        )
+        path = os.path.join(config['PROFILING_DIR'], name + KINDS[kind])
+
+        def start_profiled_response(status, headers, exc_info=None):
+            return start_response(status, headers + [('X-Profile-File', os.path.basename(path))], exc_info)
+
+        if kind == 'cprofile':
+            profiler = cProfile.Profile()
+            profiler.enable()
+        else:
+            profiler = Sampler(threading.get_ident(), config['PROFILING_SAMPLE_INTERVAL_MS'] / 1000)
+            profiler.start()
+
+        def finish():
+            # Runs once the body has been written, so streamed bodies count too.
+            if kind == 'cprofile':
+                profiler.disable()
+            else:
+                profiler.stop()
+            os.makedirs(config['PROFILING_DIR'], exist_ok=True)
+            if kind == 'cprofile':
+                profiler.dump_stats(path)
+            else:
+                with open(path, 'w') as f:
+                    f.write(profiler.collapsed() if kind == 'collapsed' else profiler.speedscope(name))
+
+        try:
+            response = self.wsgi_app(environ, start_profiled_response)
+        except BaseException:
+            finish()
+            raise
+        return ClosingIterator(response, [finish])
+
+
+def init_app(app):
+    app.config.setdefault('PROFILING', None)
+    app.config.setdefault('PROFILING_SECRET', None)
+    app.config.setdefault('PROFILING_DIR', 'profiles')
+    app.config.setdefault('PROFILING_SAMPLE_INTERVAL_MS', 1)
+    if app.config['PROFILING'] and app.config['PROFILING'] not in KINDS:
+        raise ValueError(f"Unknown profiler '{app.config['PROFILING']}'. Choose from: {', '.join(KINDS)}.")
+    app.wsgi_app = ProfilerMiddleware(app)
@@ -1,31 +1,177 @@
 #!/usr/bin/env python3
+# seed.py
+#
+# Fills the database with generated authors and posts, for development and
+# load testing. Rows are generated in chunks and written with Core
+# executemany inserts, so memory stays flat and millions of rows take
+# minutes:
+#
+#   python seed.py                                          # 25 authors, 1 post each
+#   python seed.py --authors 1000000 --posts-per-author 10 --batch-size 20000
+#
+# Chunks are generated by a pool of --workers processes while this process
+# is the only writer. Every generated row passes the model validators, every
+# post belongs to an author, and the same --seed always produces the same
+# rows, whatever the number of workers.
 
-from random import choice as rc
+import argparse
+import itertools
+import math
+import os
+import random
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 from faker import Faker
+from sqlalchemy import delete, func, insert, select
 
-from app import app
-from models import db, Author, Post
+from app import create_app
+from models import db, Author, Post, CATEGORIES, CLICKBAIT_KEYWORDS, CONTENT_MIN_LENGTH, SUMMARY_MAX_LENGTH
 
 
-fake = Faker()
+class Vocabulary:
+    # Pools of Faker output drawn once per seed. Rows are assembled from
+    # these, which is far cheaper than a Faker call per row.
 
-with app.app_context():
+    def __init__(self, seed=0, size=1000):
+        fake = Faker()
+        fake.seed_instance(seed)
+        self.first_names = sorted({fake.first_name() for _ in range(size)})
+        self.last_names = sorted({fake.last_name() for _ in range(size)})
+        self.phrases = [fake.catch_phrase() for _ in range(size)]
+        self.summaries = [fake.sentence(nb_words=12)[:SUMMARY_MAX_LENGTH] for _ in range(size)]
+        self.contents = []
+        for _ in range(size // 10):
+            content = fake.paragraph(nb_sentences=8)
+            while len(content) < CONTENT_MIN_LENGTH:
+                content += ' ' + fake.sentence()
+            self.contents.append(content)
 
-    Author.query.delete()
-    Post.query.delete()
+        # "First M. Last" combinations available before a numeric suffix is
+        # needed, and a stride coprime to it that spreads consecutive authors
+        # over the whole space instead of giving them all the same surname.
+        self.name_space = len(self.first_names) * 26 * len(self.last_names)
+        self._stride = next(k for k in itertools.count(1_000_003) if math.gcd(k, self.name_space) == 1)
 
-    authors = []
-    for n in range(25):
-        author = Author(name=fake.name(), phone_number='1324543333')
-        authors.append(author)
+    def name(self, n):
+        # The n-th author name; distinct for every n >= 0.
+        repeat, k = divmod(n, self.name_space)
+        k, first = divmod(k * self._stride % self.name_space, len(self.first_names))
+        last, initial = divmod(k, 26)
+        name = f'{self.first_names[first]} {chr(ord("A") + initial)}. {self.last_names[last]}'
+        return f'{name} {repeat + 1}' if repeat else name
 
-    db.session.add_all(authors)
-    posts = []
-    for n in range(25):
-        post = Post(title='Secret banana', content='This is the content Secret' * 50, category= 'Fiction', summary="Summary Secret" )
-        posts.append(post)
 
-    db.session.add_all(posts)
+def author_rows(vocabulary, start, count, seed=0):
+    rng = random.Random(f'{seed}:authors:{start}')
+    return [
+        {'name': vocabulary.name(n), 'phone_number': f'{rng.randrange(10 ** 10):010d}'}
+        for n in range(start, start + count)
+    ]
 
-    db.session.commit()
\ No newline at end of file
+
+def post_rows(vocabulary, author_ids, posts_per_author, seed=0, start=0):
+    rng = random.Random(f'{seed}:posts:{start}')
+    categories = sorted(CATEGORIES)
+    return [
+        {
+            'title': f'{rng.choice(CLICKBAIT_KEYWORDS)}: {rng.choice(vocabulary.phrases)}',
+            'content': rng.choice(vocabulary.contents),
+            'summary': rng.choice(vocabulary.summaries),
+            'category': rng.choice(categories),
+            'author_id': author_id,
+        }
+        for author_id in author_ids
+        for _ in range(posts_per_author)
+    ]
+
+
+# Pool worker state: the vocabulary is drawn once per process, not per chunk.
+_vocabulary = None
+
+
+def _init_worker(seed):
+    global _vocabulary
+    _vocabulary = Vocabulary(seed)
+
+
+def generate_chunk(start, count, posts_per_author, seed=0, vocabulary=None):
+    # Authors start..start+count-1 and their posts. Until the writer knows
+    # the authors' ids, a post's author_id is its author's position in the chunk.
+    vocabulary = vocabulary or _vocabulary
+    authors = author_rows(vocabulary, start, count, seed)
+    posts = post_rows(vocabulary, range(count), posts_per_author, seed, start)
+    return authors, posts
+
+
+def generate_chunks(authors, posts_per_author, batch_size, seed=0, workers=1):
+    # Yields generate_chunk() results in order. With several workers, at
+    # most two chunks per worker are generated ahead of the writer.
+    tasks = [(start, min(batch_size, authors - start)) for start in range(0, authors, batch_size)]
+    if workers <= 1:
+        vocabulary = Vocabulary(seed)
+        for start, count in tasks:
+            yield generate_chunk(start, count, posts_per_author, seed, vocabulary)
+        return
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(seed,)) as pool:
+        pending = deque()
+        for start, count in tasks:
+            pending.append(pool.submit(generate_chunk, start, count, posts_per_author, seed))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def seed_database(authors=25, posts_per_author=1, batch_size=10_000, seed=0, workers=1, log=None):
+    # Replaces every author and post. Must run in an app context, and be the
+    # only writer: author ids are read back as the ids above the previous
+    # maximum, which holds because SQLite assigns rowids in insertion order.
+    engine = db.engine
+    with engine.begin() as connection:
+        connection.execute(delete(Post))
+        connection.execute(delete(Author))
+
+    started = time.monotonic()
+    done = written = 0
+    for rows, posts in generate_chunks(authors, posts_per_author, batch_size, seed, workers):
+        with engine.begin() as connection:
+            last_id = connection.execute(select(func.max(Author.id))).scalar() or 0
+            connection.execute(insert(Author), rows)
+            ids = connection.scalars(select(Author.id).where(Author.id > last_id).order_by(Author.id)).all()
+            for post in posts:
+                post['author_id'] = ids[post['author_id']]
+            for offset in range(0, len(posts), batch_size):
+                connection.execute(insert(Post), posts[offset:offset + batch_size])
+        done += len(rows)
+        written += len(rows) + len(posts)
+        if log:
+            elapsed = time.monotonic() - started
+            log(f'{done:>12,} authors, {written:>14,} rows, {written / elapsed:>10,.0f} rows/s')
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replace all authors and posts with generated ones.')
+    parser.add_argument('--authors', type=int, default=25)
+    parser.add_argument('--posts-per-author', type=int, default=1)
+    parser.add_argument('--batch-size', type=int, default=10_000, help='rows per insert and authors per transaction')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) - 1),
+                        help='generator processes; 1 generates in the writer process')
+    args = parser.parse_args()
+    if args.authors < 0 or args.posts_per_author < 0 or args.batch_size < 1 or args.workers < 1:
+        parser.error('--authors and --posts-per-author must be >= 0, --batch-size and --workers >= 1')
+
+    # Not crash-safe, but a half-written seed is rerun anyway.
+    app = create_app({'SQLITE_PRAGMA_PRESET': 'bulk_load', 'NAME_INDEX': None, 'RESPONSE_CACHE_SIZE': 0})
+    with app.app_context():
+        started = time.monotonic()
+        written = seed_database(args.authors, args.posts_per_author, args.batch_size, args.seed, args.workers, log=print)
+        print(f'Wrote {written:,} rows in {time.monotonic() - started:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
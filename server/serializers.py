@@ -0,0 +1,109 @@
+# serializers.py
+#
+# SerializerMixin.to_dict() re-reads the mapper, the serialize_rules and the
+# type of every value on each call. For the hot paths we compile the same
+# output shape once per (model, fields, rules) into a plain Python function.
+
+from datetime import date, datetime, time
+
+from sqlalchemy import inspect
+from sqlalchemy_serializer import SerializerMixin
+
+DATETIME_FORMAT = SerializerMixin.datetime_format
+DATE_FORMAT = SerializerMixin.date_format
+TIME_FORMAT = SerializerMixin.time_format
+
+# Guards against serialize_rules that never cut a relationship cycle.
+MAX_DEPTH = 8
+
+_compiled = {}
+
+
+def _split_rules(rules):
+    # ('-posts.author', '-phone_number') -> ({'phone_number'}, {'posts': ('-author',)})
+    excluded = set()
+    nested = {}
+    for rule in rules:
+        if not rule.startswith('-'):
+            raise ValueError(f"Only exclusion rules are supported, got '{rule}'.")
+        head, _, rest = rule[1:].partition('.')
+        if rest:
+            nested.setdefault(head, []).append('-' + rest)
+        else:
+            excluded.add(head)
+    return excluded, {key: tuple(value) for key, value in nested.items()}
+
+
+def _format_name(column):
+    # Name of the strftime format to_dict() would apply to this column, if any.
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return None
+    return {
+        datetime: 'DATETIME_FORMAT',
+        date: 'DATE_FORMAT',
+        time: 'TIME_FORMAT',
+    }.get(python_type)
+
+
+def _build(model, fields, rules, namespace, depth):
+    if depth > MAX_DEPTH:
+        raise ValueError(f"serialize_rules for {model.__name__} do not terminate.")
+
+    mapper = inspect(model)
+    rules = tuple(rules) + tuple(getattr(model, 'serialize_rules', ()))
+    excluded, nested_rules = _split_rules(rules)
+
+    name = f'_serialize_{model.__name__.lower()}_{len(namespace)}'
+    namespace[name] = None  # reserve the name before recursing
+
+    lines = [f'def {name}(obj):']
+    items = []
+
+    for attr in mapper.column_attrs:
+        key = attr.key
+        if key in excluded or (fields is not None and key not in fields):
+            continue
+        fmt = _format_name(attr.columns[0])
+        if fmt is None:
+            items.append(f'{key!r}: obj.{key}')
+        else:
+            lines.append(f'    _v_{key} = obj.{key}')
+            items.append(f'{key!r}: None if _v_{key} is None else _v_{key}.strftime({fmt})')
+
+    for rel in mapper.relationships:
+        key = rel.key
+        if key in excluded or (fields is not None and key not in fields):
+            continue
+        child = _build(rel.mapper.class_, None, nested_rules.get(key, ()), namespace, depth + 1)
+        if rel.uselist:
+            items.append(f'{key!r}: [{child}(item) for item in obj.{key}]')
+        else:
+            lines.append(f'    _v_{key} = obj.{key}')
+            items.append(f'{key!r}: None if _v_{key} is None else {child}(_v_{key})')
+
+    lines.append('    return {' + ', '.join(items) + '}')
+    source = '\n'.join(lines)
+    exec(compile(source, f'<serializer {model.__name__}>', 'exec'), namespace)
+    namespace.setdefault('__sources__', []).append(source)
+    return name
+
+
+def compile_serializer(model, fields=None, rules=()):
+    # Returns a function obj -> dict equivalent to obj.to_dict(rules=rules)
+    # (restricted to the top-level `fields` when given). Compiled functions
+    # are cached, so calling this per request is a dict lookup.
+    key = (model, frozenset(fields) if fields is not None else None, tuple(rules))
+    serializer = _compiled.get(key)
+    if serializer is None:
+        namespace = {
+            'DATETIME_FORMAT': DATETIME_FORMAT,
+            'DATE_FORMAT': DATE_FORMAT,
+            'TIME_FORMAT': TIME_FORMAT,
+        }
+        name = _build(model, key[1], rules, namespace, 0)
+        serializer = namespace[name]
+        serializer.__source__ = '\n\n'.join(namespace['__sources__'])
+        _compiled[key] = serializer
+    return serializer
@@ -0,0 +1,46 @@
+# streaming.py
+
+from flask import Response, current_app, stream_with_context
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# Rows fetched from the cursor per round trip; only this many ORM objects
+# are alive at any time while a stream is being written.
+STREAM_BATCH_SIZE = 1000
+
+
+def wants_stream(request):
+    # ?stream=1|json gives a streamed JSON array, ?stream=ndjson or an
+    # Accept: application/x-ndjson header gives newline-delimited JSON.
+    # Returns None when the client asked for a normal (paginated) response.
+    stream = request.args.get('stream')
+    if stream == 'ndjson':
+        return 'ndjson'
+    if stream in ('1', 'true', 'json'):
+        return 'json'
+    if request.accept_mimetypes.best == NDJSON_MIMETYPE:
+        return 'ndjson'
+    return None
+
+
+def stream_query(query, serialize, mode, batch_size=STREAM_BATCH_SIZE):
+    dumps = current_app.json.dumps
+
+    def generate_ndjson():
+        for row in query.yield_per(batch_size):
+            yield dumps(serialize(row)) + '\n'
+
+    def generate_array():
+        yield '['
+        first = True
+        for row in query.yield_per(batch_size):
+            if first:
+                first = False
+                yield dumps(serialize(row))
+            else:
+                yield ',' + dumps(serialize(row))
+        yield ']\n'
+
+    if mode == 'ndjson':
+        return Response(stream_with_context(generate_ndjson()), mimetype=NDJSON_MIMETYPE)
+    return Response(stream_with_context(generate_array()), mimetype='application/json')
@@ -0,0 +1,733 @@
+import json
+import pytest
+from app import app
+from models import db, Author, Post
+
+
+CONTENT = 'A' * 250
+
+
+@pytest.fixture
+def client():
+    with app.app_context():
+        db.create_all()
+        db.session.query(Post).delete()
+        db.session.query(Author).delete()
+        db.session.commit()
+
+    yield app.test_client()
+
+    with app.app_context():
+        db.session.query(Post).delete()
+        db.session.query(Author).delete()
+        db.session.commit()
+
+
+def seed_authors(count):
+    with app.app_context():
+        authors = [Author(name=f'Author {n}', phone_number='1231144321') for n in range(count)]
+        db.session.add_all(authors)
+        db.session.commit()
+        return [author.id for author in authors]
+
+
+class TestPagination:
+    '''Keyset pagination on GET /authors and GET /posts'''
+
+    def test_pages_through_authors(self, client):
+        '''returns every author exactly once across pages, following next cursors.'''
+        ids = seed_authors(7)
+
+        seen = []
+        response = client.get('/authors?limit=3')
+        while True:
+            assert response.status_code == 200
+            body = response.get_json()
+            assert len(body['data']) <= 3
+            seen.extend(author['id'] for author in body['data'])
+            if body['next'] is None:
+                break
+            response = client.get(f"/authors?limit=3&after={body['next']}")
+
+        assert seen == sorted(ids)
+
+    def test_descending_created_at(self, client):
+        '''orders by created_at then id when sort=-created_at.'''
+        ids = seed_authors(4)
+
+        first = client.get('/authors?limit=2&sort=-created_at').get_json()
+        second = client.get(f"/authors?limit=2&sort=-created_at&after={first['next']}").get_json()
+
+        seen = [a['id'] for a in first['data']] + [a['id'] for a in second['data']]
+        assert sorted(seen) == sorted(ids)
+        assert len(set(seen)) == 4
+
+    def test_ascending_created_at_same_second(self, client):
+        '''does not drop rows created within the same second as the cursor.'''
+        ids = seed_authors(5)
+
+        seen = []
+        response = client.get('/authors?limit=2&sort=created_at')
+        while True:
+            body = response.get_json()
+            seen.extend(author['id'] for author in body['data'])
+            if body['next'] is None:
+                break
+            response = client.get(f"/authors?limit=2&sort=created_at&after={body['next']}")
+
+        assert seen == ids
+
+    def test_rejects_tampered_cursor(self, client):
+        '''returns 400, not 500, for cursor values of the wrong type.'''
+        from pagination import encode_cursor
+
+        seed_authors(1)
+        cursor = encode_cursor({'id': 1, 'sort': 'created_at', 'created_at': 'yesterday'})
+
+        assert client.get(f'/authors?sort=created_at&after={cursor}').status_code == 400
+        for id in ([1], '1', True, None):
+            response = client.get(f"/authors?after={encode_cursor({'id': id})}")
+            assert response.status_code == 400
+            assert 'SELECT' not in response.get_data(as_text=True)
+
+    def test_rejects_bad_arguments(self, client):
+        '''returns 400 for invalid limits, sorts and cursors.'''
+        assert client.get('/posts?limit=0').status_code == 400
+        assert client.get('/posts?limit=abc').status_code == 400
+        assert client.get('/posts?sort=title').status_code == 400
+        assert client.get('/posts?after=not-a-cursor').status_code == 400
+
+
+def seed_posts(author_id, count):
+    with app.app_context():
+        posts = [
+            Post(title=f'Top {n} Secrets', content=CONTENT, category='Fiction', summary='Short', author_id=author_id)
+            for n in range(count)
+        ]
+        db.session.add_all(posts)
+        db.session.commit()
+        return [post.id for post in posts]
+
+
+class TestStreaming:
+    '''Streaming full-table listings from GET /posts'''
+
+    def test_streams_ndjson(self, client):
+        '''writes one JSON document per line for ?stream=ndjson.'''
+        [author_id] = seed_authors(1)
+        ids = seed_posts(author_id, 5)
+
+        response = client.get('/posts?stream=ndjson')
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+
+        lines = response.get_data(as_text=True).splitlines()
+        assert [json.loads(line)['id'] for line in lines] == ids
+
+    def test_streams_json_array(self, client):
+        '''writes a single JSON array for ?stream=1.'''
+        [author_id] = seed_authors(1)
+        ids = seed_posts(author_id, 3)
+
+        response = client.get('/posts?stream=1')
+        assert response.status_code == 200
+        assert [post['id'] for post in response.get_json()] == ids
+
+    def test_streams_empty_table(self, client):
+        '''writes an empty array when there are no rows.'''
+        response = client.get('/posts?stream=1')
+        assert response.get_json() == []
+
+
+class TestEagerLoading:
+    '''Relationship loading on the list and detail endpoints'''
+
+    def test_authors_list_is_not_n_plus_one(self, client, max_queries):
+        '''loads a page of authors and all their posts in a bounded number of queries.'''
+        for author_id in seed_authors(10):
+            seed_posts(author_id, 2)
+
+        with max_queries(2):
+            response = client.get('/authors')
+
+        assert response.status_code == 200
+        assert all(len(author['posts']) == 2 for author in response.get_json()['data'])
+
+    def test_posts_list_is_not_n_plus_one(self, client, max_queries):
+        '''loads a page of posts and their authors in a single query.'''
+        for author_id in seed_authors(5):
+            seed_posts(author_id, 2)
+
+        with max_queries(1):
+            response = client.get('/posts')
+
+        assert response.status_code == 200
+        assert all(post['author'] is not None for post in response.get_json()['data'])
+
+    def test_author_detail(self, client, max_queries):
+        '''loads an author and their posts in a bounded number of queries.'''
+        [author_id] = seed_authors(1)
+        seed_posts(author_id, 3)
+
+        with max_queries(2):
+            response = client.get(f'/authors/{author_id}')
+
+        assert len(response.get_json()['posts']) == 3
+
+
+class TestSparseFieldsets:
+    '''?fields= on the author and post endpoints'''
+
+    def test_returns_only_requested_fields(self, client):
+        '''serializes only the requested attributes.'''
+        [author_id] = seed_authors(1)
+        [post_id] = seed_posts(author_id, 1)
+
+        body = client.get('/posts?fields=id,title').get_json()
+        assert body['data'] == [{'id': post_id, 'title': 'Top 0 Secrets'}]
+
+        body = client.get(f'/posts/{post_id}?fields=title,author').get_json()
+        assert set(body) == {'title', 'author'}
+        assert body['author']['id'] == author_id
+
+    def test_does_not_select_unrequested_columns(self, client, max_queries):
+        '''never fetches deferred columns such as content.'''
+        [author_id] = seed_authors(1)
+        seed_posts(author_id, 3)
+
+        with max_queries(1) as statements:
+            client.get('/posts?fields=id,title')
+
+        assert 'content' not in statements[0]
+        assert 'authors' not in statements[0]
+
+    def test_rejects_unknown_fields(self, client):
+        '''returns 400 for attributes the model does not have.'''
+        assert client.get('/authors?fields=id,password').status_code == 400
+
+
+class TestBulkAuthors:
+    '''POST /authors/bulk'''
+
+    def test_creates_valid_rows(self, client, max_queries):
+        '''inserts every valid row and reports per-row results.'''
+        rows = [{'name': f'Bulk {n}', 'phone_number': '1231144321'} for n in range(20)]
+
+        with max_queries(6):
+            response = client.post('/authors/bulk', json=rows)
+
+        body = response.get_json()
+        assert response.status_code == 200
+        assert body['created'] == 20
+        assert all(result['id'] for result in body['results'])
+        with app.app_context():
+            assert Author.query.count() == 20
+
+    def test_reports_invalid_rows(self, client):
+        '''rejects rows failing validation or duplicating a name, by index.'''
+        seed_authors(1)
+        rows = [
+            {'name': 'Good', 'phone_number': '1231144321'},
+            {'name': '', 'phone_number': '1231144321'},
+            {'name': 'Bad Phone', 'phone_number': '123'},
+            {'name': 'Good'},
+            {'name': 'Author 0'},
+            'not an object',
+        ]
+
+        body = client.post('/authors/bulk', json=rows).get_json()
+
+        assert body['created'] == 1
+        assert [result['index'] for result in body['results'] if 'error' in result] == [1, 2, 3, 4, 5]
+
+    def test_rejects_non_string_names(self, client):
+        '''reports a per-row error for names that are not strings.'''
+        rows = [{'name': ['x']}, {'name': {'a': 1}}, {'name': 5}, {'name': 'Good'}]
+
+        response = client.post('/authors/bulk', json=rows)
+
+        body = response.get_json()
+        assert response.status_code == 200
+        assert body['created'] == 1
+        assert [result['index'] for result in body['results'] if 'error' in result] == [0, 1, 2]
+
+    def test_accepts_ndjson(self, client):
+        '''parses an NDJSON request body.'''
+        data = '{"name": "Line One"}\n\n{"name": "Line Two"}\n'
+
+        response = client.post('/authors/bulk', data=data, content_type='application/x-ndjson')
+
+        assert response.get_json()['created'] == 2
+
+
+class TestBulkPosts:
+    '''POST /posts/bulk'''
+
+    def test_ingests_ndjson_in_chunks(self, client):
+        '''inserts valid lines across several chunks and reports bad lines.'''
+        [author_id] = seed_authors(1)
+        good = json.dumps({'title': 'Top Secret', 'content': CONTENT, 'category': 'Fiction', 'author_id': author_id})
+        lines = [
+            good,
+            good,
+            '{not json',
+            json.dumps({'title': 'Boring', 'content': CONTENT, 'category': 'Fiction', 'author_id': author_id}),
+            json.dumps({'title': 'Top Secret', 'content': CONTENT, 'category': 'Fiction', 'author_id': author_id + 1}),
+            '',
+            good,
+            json.dumps({'title': 'Top Secret', 'content': CONTENT, 'category': 'Fiction'}),
+        ]
+
+        response = client.post(
+            '/posts/bulk?chunk_size=2',
+            data='\n'.join(lines) + '\n',
+            content_type='application/x-ndjson',
+        )
+
+        body = response.get_json()
+        assert response.status_code == 200
+        assert body['created'] == 3
+        assert [error['line'] for error in body['errors']] == [3, 4, 5, 8]
+        with app.app_context():
+            assert Post.query.count() == 3
+
+    def test_rejects_bad_chunk_size(self, client):
+        '''returns 400 for a non-positive chunk size.'''
+        assert client.post('/posts/bulk?chunk_size=0', data='').status_code == 400
+
+
+class TestGroupCommit:
+    '''Write-behind group commit for POST /authors and POST /posts'''
+
+    @pytest.fixture
+    def group_commit(self, client):
+        app.config['GROUP_COMMIT'] = True
+        yield client
+        app.config['GROUP_COMMIT'] = False
+        app.extensions['group_commit'].stop()
+
+    def test_concurrent_creates(self, group_commit):
+        '''gives every concurrent request its own id.'''
+        from concurrent.futures import ThreadPoolExecutor
+
+        def create(n):
+            with app.test_client() as client:
+                return client.post('/authors', json={'name': f'Grouped {n}', 'phone_number': '1231144321'})
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            responses = list(pool.map(create, range(32)))
+
+        assert all(response.status_code == 201 for response in responses)
+        assert len({response.get_json()['id'] for response in responses}) == 32
+
+    def test_reports_integrity_errors(self, group_commit):
+        '''returns each request its own constraint violation.'''
+        seed_authors(1)
+
+        response = group_commit.post('/authors', json={'name': 'Author 0'})
+
+        assert response.status_code == 400
+
+
+class TestSQLiteTuning:
+    '''Connection PRAGMAs from sqlite_tuning.py'''
+
+    def test_applies_preset(self, client):
+        '''runs the configured preset on new connections.'''
+        with app.app_context():
+            assert db.session.execute(db.text('PRAGMA journal_mode')).scalar().lower() == 'wal'
+            assert db.session.execute(db.text('PRAGMA synchronous')).scalar() == 1  # NORMAL
+            assert db.session.execute(db.text('PRAGMA foreign_keys')).scalar() == 1
+
+    def test_rejects_orphan_post(self, client):
+        '''refuses a post whose author does not exist.'''
+        response = client.post('/posts', json={
+            'title': 'Top Secret', 'content': CONTENT, 'category': 'Fiction', 'author_id': 999,
+        })
+
+        assert response.status_code == 400
+        with app.app_context():
+            assert db.session.query(Post).count() == 0
+
+    def test_rejects_unknown_pragmas(self):
+        '''refuses pragmas and values outside the allowlist.'''
+        import sqlite_tuning
+
+        with pytest.raises(ValueError):
+            sqlite_tuning.resolve_pragmas('wal', {'writable_schema': 'ON'})
+        with pytest.raises(ValueError):
+            sqlite_tuning.resolve_pragmas('wal', {'synchronous': 'NORMAL; DROP TABLE authors'})
+        with pytest.raises(ValueError):
+            sqlite_tuning.resolve_pragmas('fastest')
+
+
+class TestAuthorPosts:
+    '''GET /authors/<id>/posts'''
+
+    def test_pages_through_one_authors_posts(self, client, max_queries):
+        '''returns only that author's posts, page by page, in created_at order.'''
+        first, second = seed_authors(2)
+        ids = seed_posts(first, 5)
+        seed_posts(second, 3)
+
+        seen = []
+        response = client.get(f'/authors/{first}/posts?limit=2')
+        while True:
+            body = response.get_json()
+            seen.extend(post['id'] for post in body['data'])
+            if body['next'] is None:
+                break
+            with max_queries(3):
+                response = client.get(f"/authors/{first}/posts?limit=2&after={body['next']}")
+
+        assert seen == ids
+
+    def test_newest_first_within_one_second(self, client):
+        '''pages newest first without repeating posts created in the same second.'''
+        [author_id] = seed_authors(1)
+        ids = seed_posts(author_id, 5)
+
+        seen = []
+        response = client.get(f'/authors/{author_id}/posts?limit=2&sort=-created_at')
+        while True:
+            body = response.get_json()
+            seen.extend(post['id'] for post in body['data'])
+            if body['next'] is None:
+                break
+            response = client.get(f"/authors/{author_id}/posts?limit=2&sort=-created_at&after={body['next']}")
+
+        assert seen == ids[::-1]
+
+    def test_missing_author(self, client):
+        '''returns 404 for an unknown author.'''
+        assert client.get('/authors/999999/posts').status_code == 404
+
+
+class TestResponseCache:
+    '''Read-through cache on GET /authors/<id> and GET /posts/<id>'''
+
+    def test_serves_repeat_reads_from_cache(self, client, max_queries):
+        '''answers a repeated by-id read without touching the database.'''
+        [author_id] = seed_authors(1)
+        [post_id] = seed_posts(author_id, 1)
+
+        first = client.get(f'/posts/{post_id}')
+        before = client.get('/cache/stats').get_json()
+        with max_queries(0):
+            second = client.get(f'/posts/{post_id}')
+
+        assert second.get_json() == first.get_json()
+        assert client.get('/cache/stats').get_json()['hits'] == before['hits'] + 1
+
+    def test_invalidates_on_update(self, client):
+        '''drops cached bodies when a row they were built from changes.'''
+        [author_id] = seed_authors(1)
+        [post_id] = seed_posts(author_id, 1)
+        client.get(f'/authors/{author_id}')
+        client.get(f'/posts/{post_id}')
+
+        with app.app_context():
+            db.session.get(Author, author_id).phone_number = '9999999999'
+            db.session.get(Post, post_id).summary = 'Changed'
+            db.session.commit()
+
+        assert client.get(f'/authors/{author_id}').get_json()['phone_number'] == '9999999999'
+        post = client.get(f'/posts/{post_id}').get_json()
+        assert post['summary'] == 'Changed'
+        assert post['author']['phone_number'] == '9999999999'
+
+    def test_new_post_invalidates_author(self, client):
+        '''drops the author body when one of their posts is created.'''
+        [author_id] = seed_authors(1)
+        assert client.get(f'/authors/{author_id}').get_json()['posts'] == []
+
+        client.post('/posts', json={
+            'title': 'Top Secret', 'content': CONTENT, 'category': 'Fiction', 'author_id': author_id,
+        })
+
+        assert len(client.get(f'/authors/{author_id}').get_json()['posts']) == 1
+
+
+class TestConditionalRequests:
+    '''ETag / Last-Modified on the read routes'''
+
+    def test_list_not_modified(self, client):
+        '''answers a matching If-None-Match on GET /posts with an empty 304.'''
+        [author_id] = seed_authors(1)
+        seed_posts(author_id, 2)
+
+        first = client.get('/posts')
+        assert first.headers['ETag']
+        assert 'Last-Modified' not in first.headers
+
+        second = client.get('/posts', headers={'If-None-Match': first.headers['ETag']})
+        assert second.status_code == 304
+        assert second.get_data() == b''
+
+    def test_list_changes_etag(self, client):
+        '''issues a new ETag once the page content changes.'''
+        [author_id] = seed_authors(1)
+        seed_posts(author_id, 1)
+        etag = client.get('/posts').headers['ETag']
+
+        seed_posts(author_id, 1)
+
+        response = client.get('/posts', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+
+    def test_list_deleted_row_is_modified(self, client):
+        '''serves the full page again once a row on it is deleted.'''
+        author_ids = seed_authors(2)
+        first = client.get('/authors')
+
+        with app.app_context():
+            db.session.delete(db.session.get(Author, author_ids[0]))
+            db.session.commit()
+
+        response = client.get('/authors', headers={'If-None-Match': first.headers['ETag']})
+        assert response.status_code == 200
+        response = client.get('/authors', headers={'If-Modified-Since': 'Fri, 01 Jan 2100 00:00:00 GMT'})
+        assert response.status_code == 200
+        assert [author['id'] for author in response.get_json()['data']] == author_ids[1:]
+
+    def test_by_id_not_modified(self, client):
+        '''answers If-None-Match and If-Modified-Since on the by-id routes, cached or not.'''
+        [author_id] = seed_authors(1)
+
+        first = client.get(f'/authors/{author_id}')
+        for _ in range(2):
+            response = client.get(f'/authors/{author_id}', headers={'If-None-Match': first.headers['ETag']})
+            assert response.status_code == 304
+            assert response.headers['ETag'] == first.headers['ETag']
+
+        response = client.get(f'/authors/{author_id}', headers={'If-Modified-Since': first.headers['Last-Modified']})
+        assert response.status_code == 304
+
+    def test_updates_within_one_second_change_etag(self, client):
+        '''issues a new ETag for every update, even two within the same second.'''
+        [author_id] = seed_authors(1)
+        etags = [client.get(f'/authors/{author_id}').headers['ETag']]
+        for phone_number in ('1111111111', '2222222222'):
+            with app.app_context():
+                db.session.get(Author, author_id).phone_number = phone_number
+                db.session.commit()
+            response = client.get(f'/authors/{author_id}', headers={'If-None-Match': etags[-1]})
+            assert response.status_code == 200
+            etags.append(response.headers['ETag'])
+
+        assert len(set(etags)) == 3
+        assert 'version_id' not in response.get_json()
+
+
+class TestNameIndex:
+    '''Duplicate author names rejected by the in-memory name index'''
+
+    def test_rejects_duplicate_without_insert(self, client, max_queries):
+        '''answers a duplicate POST /authors without attempting an INSERT.'''
+        seed_authors(1)
+
+        with max_queries(3) as statements:
+            response = client.post('/authors', json={'name': 'Author 0', 'phone_number': '1231144321'})
+
+        assert response.status_code == 400
+        assert not any(statement.lstrip().upper().startswith('INSERT') for statement in statements)
+
+    def test_tracks_deletes_and_renames(self, client):
+        '''frees a name once its author is renamed or deleted.'''
+        [author_id] = seed_authors(1)
+        with app.app_context():
+            db.session.get(Author, author_id).name = 'Renamed'
+            db.session.commit()
+
+        assert client.post('/authors', json={'name': 'Author 0'}).status_code == 201
+        assert client.post('/authors', json={'name': 'Renamed'}).status_code == 400
+
+        with app.app_context():
+            db.session.delete(db.session.get(Author, author_id))
+            db.session.commit()
+
+        assert client.post('/authors', json={'name': 'Renamed'}).status_code == 201
+
+    def test_warms_on_first_use(self, tmp_path):
+        '''reads no author names until a name is first checked.'''
+        from app import create_app
+
+        other = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'other.db'}"})
+        index = other.extensions['name_index']
+        assert index._names is None
+
+        with other.app_context():
+            db.create_all()
+        other.test_client().post('/authors', json={'name': 'Elsewhere', 'phone_number': '1231144321'})
+
+        assert 'Elsewhere' in index._names
+
+    def test_bloom_filter(self):
+        '''never misses a name it was given.'''
+        from name_index import BloomFilter
+
+        bloom = BloomFilter(capacity=1000)
+        names = [f'Author {n}' for n in range(1000)]
+        for name in names:
+            bloom.add(name)
+
+        assert all(name in bloom for name in names)
+        assert sum(f'Other {n}' in bloom for n in range(1000)) < 50
+
+
+class TestAppFactory:
+    '''create_app() in app.py'''
+
+    def test_independent_apps(self, tmp_path):
+        '''builds an app with its own config and database.'''
+        from app import create_app
+
+        other = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'other.db'}", 'NAME_INDEX': None})
+        with other.app_context():
+            db.create_all()
+
+        response = other.test_client().post('/authors', json={'name': 'Elsewhere', 'phone_number': '1231144321'})
+
+        assert response.status_code == 201
+        with app.app_context():
+            assert Author.query.filter_by(name='Elsewhere').first() is None
+
+    def test_defers_flask_migrate(self):
+        '''does not import Flask-Migrate or Alembic outside the flask CLI.'''
+        import os
+        import subprocess
+        import sys
+
+        code = "import sys, app; print(any(m in sys.modules for m in ('flask_migrate', 'alembic')))"
+        server = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        output = subprocess.run([sys.executable, '-c', code], cwd=server, capture_output=True, text=True, check=True).stdout
+
+        assert output.strip() == 'False'
+
+
+class TestInstrumentation:
+    '''Server-Timing headers and GET /timings'''
+
+    def test_server_timing_header(self, client):
+        '''reports the query count and durations of the request.'''
+        seed_authors(2)
+
+        response = client.get('/authors')
+
+        header = response.headers['Server-Timing']
+        assert 'db;dur=' in header and 'serialize;dur=' in header and 'total;dur=' in header
+        assert 'desc="1 queries"' in header or 'desc="2 queries"' in header
+
+    def test_aggregates_per_route(self, client):
+        '''adds every request to the histograms of its route.'''
+        [author_id] = seed_authors(1)
+        app.extensions['timings'].reset()
+
+        for _ in range(3):
+            client.get(f'/authors/{author_id}')
+        timings = client.get('/timings').get_json()
+
+        route = timings['GET /authors/<int:id>']
+        assert route['latency_ms']['count'] == 3
+        assert sum(route['queries']['buckets'].values()) == 3
+
+
+class TestMetrics:
+    '''Prometheus metrics on GET /metrics'''
+
+    def test_counts_requests_and_failures(self, client):
+        '''exports request counts, latency buckets and validation failures.'''
+        seed_authors(1)
+        client.get('/authors')
+        client.post('/posts', json={'title': 'Boring', 'content': CONTENT, 'category': 'Fiction'})
+        client.post('/authors', json={'name': 'Author 0'})
+
+        response = client.get('/metrics')
+        body = response.get_data(as_text=True)
+
+        assert response.status_code == 200
+        assert response.mimetype == 'text/plain'
+        assert 'http_requests_total{method="GET",route="/authors",status="200"}' in body
+        assert 'http_request_duration_seconds_bucket{method="GET",route="/authors",le="+Inf"}' in body
+        assert 'validation_failures_total{validator="validate_title"}' in body
+        assert 'validation_failures_total{validator="validate_name"}' in body
+
+    def test_durations_match_timings(self, client):
+        '''records the same request latencies as GET /timings.'''
+        # Both are app-wide and other tests reset /timings, so compare deltas.
+        def totals():
+            latency = app.extensions['timings'].snapshot().get('GET /authors', {}).get('latency_ms', {'count': 0, 'sum': 0})
+            values = app.extensions['metrics'].collect().histograms.get(
+                ('http_request_duration_seconds', (('method', 'GET'), ('route', '/authors'))), [0],
+            )
+            return latency['count'], latency['sum'], sum(values[:-1]), values[-1] * 1000
+
+        before = totals()
+        client.get('/authors')
+        after = totals()
+
+        timings_count, timings_ms, metrics_count, metrics_ms = (a - b for a, b in zip(after, before))
+        assert timings_count == metrics_count == 1
+        assert metrics_ms == pytest.approx(timings_ms, abs=0.01)
+
+    def test_sums_thread_shards(self):
+        '''adds up values recorded from several threads, including finished ones.'''
+        import threading
+        from metrics import Registry
+
+        registry = Registry()
+
+        def record():
+            for _ in range(1000):
+                registry.inc('db_integrity_errors_total')
+
+        threads = [threading.Thread(target=record) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        record()
+
+        assert registry.collect().counters[('db_integrity_errors_total', ())] == 5000
+
+
+class TestProfiling:
+    '''Per-request profiles from profiling.py'''
+
+    @pytest.fixture
+    def profiled(self, client, tmp_path):
+        app.config.update(PROFILING_SECRET='secret', PROFILING_DIR=str(tmp_path))
+        yield tmp_path
+        app.config.update(PROFILING_SECRET=None, PROFILING_DIR='profiles')
+
+    def test_signed_header(self, client, profiled):
+        '''writes a pstats file for a request with a valid X-Profile header.'''
+        import pstats
+        from profiling import header_value
+
+        header = header_value('secret', 'cprofile', 'GET', '/posts')
+        response = client.get('/posts', headers={'X-Profile': header}, buffered=True)
+
+        path = profiled / response.headers['X-Profile-File']
+        assert response.status_code == 200
+        assert pstats.Stats(str(path)).total_calls > 0
+
+    def test_speedscope(self, client, profiled):
+        '''writes a speedscope file when asked for a sampling profile.'''
+        from profiling import header_value
+
+        header = header_value('secret', 'speedscope', 'GET', '/authors')
+        response = client.get('/authors', headers={'X-Profile': header}, buffered=True)
+
+        profile = json.loads((profiled / response.headers['X-Profile-File']).read_text())
+        assert profile['profiles'][0]['type'] == 'sampled'
+
+    def test_rejects_bad_signatures(self, client, profiled):
+        '''ignores headers signed with another secret or for another path.'''
+        from profiling import header_value
+
+        for header in (header_value('other', 'cprofile', 'GET', '/posts'), header_value('secret', 'cprofile', 'GET', '/authors')):
+            response = client.get('/posts', headers={'X-Profile': header}, buffered=True)
+            assert 'X-Profile-File' not in response.headers
+        assert list(profiled.iterdir()) == []
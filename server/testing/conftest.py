@@ -1,9 +1,44 @@
 #!/usr/bin/env python3
 
+import contextlib
+
+import pytest
+from sqlalchemy import event
+
+
 def pytest_itemcollected(item):
     par = item.parent.obj
     node = item.obj
     pref = par.__doc__.strip() if par.__doc__ else par.__class__.__name__
     suf = node.__doc__.strip() if node.__doc__ else node.__name__
     if pref or suf:
-        item._nodeid = ' '.join((pref, suf))
\ No newline at end of file
+        item._nodeid = ' '.join((pref, suf))
+
+
+@pytest.fixture
+def max_queries():
+    '''Fails the test when the wrapped block runs more than `limit` SQL statements.'''
+
+    @contextlib.contextmanager
+    def guard(limit):
+        from app import app
+        from models import db
+
+        statements = []
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', count)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, 'before_cursor_execute', count)
+
+        assert len(statements) <= limit, (
+            f"expected at most {limit} queries, got {len(statements)}:\n" + '\n'.join(statements)
+        )
+
+    return guard
@@ -0,0 +1,45 @@
+from datetime import datetime
+
+from flask import Flask
+
+import json_provider
+
+
+def make_app(**config):
+    app = Flask(__name__)
+    app.config.update(config)
+    json_provider.init_app(app)
+    return app
+
+
+class TestFastJSONProvider:
+    '''FastJSONProvider in json_provider.py'''
+
+    def test_compact_by_default(self):
+        '''writes compact responses outside debug mode.'''
+        app = make_app()
+        with app.app_context():
+            body = app.json.response({'a': [1, 2]}).get_data(as_text=True)
+        assert body == '{"a":[1,2]}\n'
+
+    def test_pretty_in_debug(self):
+        '''pretty-prints responses when the app runs in debug mode.'''
+        app = make_app()
+        app.debug = True
+        with app.app_context():
+            body = app.json.response({'a': 1}).get_data(as_text=True)
+        assert body == '{\n  "a": 1\n}\n'
+
+    def test_compact_setting_wins(self):
+        '''honours JSON_COMPACT over the debug flag.'''
+        app = make_app(JSON_COMPACT=True)
+        app.debug = True
+        with app.app_context():
+            body = app.json.response({'a': 1}).get_data(as_text=True)
+        assert body == '{"a":1}\n'
+
+    def test_datetimes(self):
+        '''formats datetimes like SerializerMixin.to_dict().'''
+        app = make_app()
+        value = datetime(2023, 11, 4, 17, 22, 44, 672769)
+        assert app.json.loads(app.json.dumps({'created_at': value})) == {'created_at': '2023-11-04 17:22:44'}
@@ -0,0 +1,28 @@
+import os
+
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from flask import Flask
+from flask_migrate import Migrate, upgrade
+
+from models import db
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'migrations')
+
+
+class TestMigrations:
+    '''Alembic migrations in migrations/versions'''
+
+    def test_match_models(self, tmp_path):
+        '''upgrade to a schema identical to the one declared in models.py.'''
+        migrated = Flask(__name__)
+        migrated.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'migrated.db'}"
+        db.init_app(migrated)
+        Migrate(migrated, db, directory=MIGRATIONS, render_as_batch=True)
+
+        with migrated.app_context():
+            upgrade(directory=MIGRATIONS)
+            with db.engine.connect() as connection:
+                diff = compare_metadata(MigrationContext.configure(connection), db.metadata)
+
+        assert diff == []
@@ -115,4 +115,20 @@ class TestPost:
         with app.app_context():
             content_string = "A" * 260
             with pytest.raises(ValueError):
-                post = Post(title='Why I love programming.', content=content_string, category='Fiction')
\ No newline at end of file
+                post = Post(title='Why I love programming.', content=content_string, category='Fiction')
+
+    def test_title_requires_string(self):
+        '''Missing or non-string titles raise ValueError.'''
+        with app.app_context():
+            content_string = "A" * 260
+            with pytest.raises(ValueError):
+                post = Post(title=None, content=content_string, category='Fiction')
+            with pytest.raises(ValueError):
+                post = Post(title=['Secret'], content=content_string, category='Fiction')
+
+    def test_category_requires_string(self):
+        '''Unhashable categories raise ValueError rather than TypeError.'''
+        with app.app_context():
+            content_string = "A" * 251
+            with pytest.raises(ValueError):
+                post = Post(title='Top Ten Reasons I Love Programming.', content=content_string, category=['Fiction'])
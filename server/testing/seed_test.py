@@ -0,0 +1,44 @@
+from app import create_app
+from models import db, Author, Post
+from seed import Vocabulary, author_rows, post_rows, seed_database
+from validation import validate_many
+
+
+class TestSeed:
+    '''Generated datasets from seed.py'''
+
+    def test_rows_are_valid(self):
+        '''generates unique author names and rows that pass every validator.'''
+        vocabulary = Vocabulary(seed=1)
+        authors = author_rows(vocabulary, 0, 5000, seed=1)
+        posts = post_rows(vocabulary, range(1, 51), 3, seed=1)
+
+        assert len({row['name'] for row in authors}) == 5000
+        assert all(validate_many(Author, authors)[0])
+        assert all(validate_many(Post, posts)[0])
+
+    def test_deterministic(self):
+        '''produces the same rows for the same seed.'''
+        assert author_rows(Vocabulary(seed=2), 100, 10, seed=2) == author_rows(Vocabulary(seed=2), 100, 10, seed=2)
+
+    def test_links_posts_to_authors(self, tmp_path):
+        '''inserts the requested number of authors, each with its posts.'''
+        app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'seed.db'}", 'NAME_INDEX': None})
+        with app.app_context():
+            db.create_all()
+
+            written = seed_database(authors=45, posts_per_author=3, batch_size=20)
+
+            assert written == 45 + 45 * 3
+            assert Author.query.count() == 45
+            counts = db.session.query(Post.author_id, db.func.count()).group_by(Post.author_id).all()
+            assert len(counts) == 45 and all(count == 3 for _, count in counts)
+
+    def test_parallel_generation_matches_serial(self):
+        '''generates the same chunks with a process pool as in one process.'''
+        from seed import generate_chunks
+
+        serial = list(generate_chunks(30, 2, 7, seed=3, workers=1))
+        parallel = list(generate_chunks(30, 2, 7, seed=3, workers=2))
+
+        assert parallel == serial
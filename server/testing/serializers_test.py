@@ -0,0 +1,41 @@
+from app import app
+from models import db, Author, Post
+from serializers import compile_serializer
+
+
+class TestCompiledSerializers:
+    '''compile_serializer in serializers.py'''
+
+    def test_matches_to_dict(self):
+        '''produces the same dicts as SerializerMixin.to_dict().'''
+        with app.app_context():
+            db.create_all()
+            db.session.query(Post).delete()
+            db.session.query(Author).delete()
+
+            author = Author(name='Compiled Author', phone_number='1231144321')
+            db.session.add(author)
+            db.session.flush()
+            db.session.add(Post(title='Top Secret', content='A' * 250, category='Fiction', summary='Short', author_id=author.id))
+            db.session.commit()
+
+            author = db.session.get(Author, author.id)
+            post = author.posts[0]
+            assert compile_serializer(Author)(author) == author.to_dict()
+            assert compile_serializer(Post)(post) == post.to_dict()
+
+            db.session.query(Post).delete()
+            db.session.query(Author).delete()
+            db.session.commit()
+
+    def test_restricts_fields(self):
+        '''only emits the requested top-level fields.'''
+        post = Post(title='Top Secret', content='A' * 250, category='Fiction')
+        serializer = compile_serializer(Post, fields=['title', 'category'])
+
+        assert serializer(post) == {'title': 'Top Secret', 'category': 'Fiction'}
+
+    def test_is_cached(self):
+        '''returns the same function for the same model and fields.'''
+        assert compile_serializer(Author) is compile_serializer(Author)
+        assert compile_serializer(Post, fields=['id', 'title']) is compile_serializer(Post, fields=['title', 'id'])
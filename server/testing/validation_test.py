@@ -0,0 +1,63 @@
+import pytest
+
+from models import Author, Post
+from validation import validate_many
+
+
+CONTENT = 'A' * 250
+
+
+class TestValidateMany:
+    '''validate_many in validation.py'''
+
+    def test_matches_orm_validators(self):
+        '''flags exactly the rows the @validates hooks would reject.'''
+        rows = [
+            {'title': 'Top Secret', 'content': CONTENT, 'summary': 'Short', 'category': 'Fiction'},
+            {'title': 'Boring', 'content': CONTENT, 'category': 'Fiction'},
+            {'title': 'Guess What', 'content': 'A' * 249, 'category': 'Fiction'},
+            {'title': 'Guess What', 'content': CONTENT, 'summary': 'T' * 251, 'category': 'Fiction'},
+            {'title': 'Guess What', 'content': CONTENT, 'category': 'Banana'},
+            {'content': CONTENT, 'category': 'Non-Fiction'},
+        ]
+
+        mask, errors = validate_many(Post, rows)
+
+        for row, ok in zip(rows, mask):
+            if ok:
+                Post(**row)
+            else:
+                with pytest.raises(ValueError):
+                    Post(title=row.get('title'), content=row.get('content'),
+                         summary=row.get('summary'), category=row.get('category'))
+        assert mask == [True, False, False, False, False, False]
+        assert set(errors[1]) == {'title'}
+        assert set(errors[4]) == {'category'}
+
+    def test_columns(self):
+        '''accepts a dict of columns and reports every failing field per row.'''
+        mask, errors = validate_many(Author, {
+            'name': ['Jane', '', 'Bob'],
+            'phone_number': ['1231144321', '123', None],
+        })
+
+        assert mask == [True, False, True]
+        assert set(errors[1]) == {'name', 'phone_number'}
+
+    def test_rejects_non_objects(self):
+        '''marks rows that are not dicts.'''
+        mask, errors = validate_many(Author, [{'name': 'Jane'}, ['Jane']])
+
+        assert mask == [True, False]
+        assert errors[1] == {'row': "Row must be a JSON object."}
+
+    def test_numpy_columns(self):
+        '''accepts NumPy arrays as columns.'''
+        np = pytest.importorskip('numpy')
+
+        mask, _ = validate_many(Author, {
+            'name': np.array(['Jane', '']),
+            'phone_number': np.array(['1231144321', '1231144321']),
+        })
+
+        assert mask == [True, False]
@@ -0,0 +1,119 @@
+# validation.py
+#
+# Column-wise versions of the @validates rules in models.py, for checking
+# large batches without constructing an ORM object per row:
+#
+#   mask, errors = validate_many(Post, rows)
+#
+# `rows` is either a list of dicts or a dict of columns (lists, NumPy arrays
+# or Arrow arrays). `mask[i]` is True when row i passes every rule and
+# `errors[i]` is None or a {field: message} dict.
+
+from models import (
+    Author, Post,
+    PHONE_NUMBER_PATTERN, CONTENT_MIN_LENGTH, SUMMARY_MAX_LENGTH, CATEGORIES, CLICKBAIT_PATTERN,
+    NAME_ERROR, PHONE_NUMBER_ERROR, CONTENT_ERROR, SUMMARY_ERROR, CATEGORY_ERROR, TITLE_ERROR,
+)
+
+ROW_ERROR = "Row must be a JSON object."
+
+
+def _names(values):
+    return [None if isinstance(value, str) and value else NAME_ERROR for value in values]
+
+
+def _phone_numbers(values):
+    match = PHONE_NUMBER_PATTERN.fullmatch
+    return [
+        None if value is None or (isinstance(value, str) and match(value)) else PHONE_NUMBER_ERROR
+        for value in values
+    ]
+
+
+def _contents(values):
+    return [
+        None if isinstance(value, str) and len(value) >= CONTENT_MIN_LENGTH else CONTENT_ERROR
+        for value in values
+    ]
+
+
+def _summaries(values):
+    return [
+        SUMMARY_ERROR if value and (not isinstance(value, str) or len(value) > SUMMARY_MAX_LENGTH) else None
+        for value in values
+    ]
+
+
+def _categories(values):
+    return [
+        None if isinstance(value, str) and value in CATEGORIES else CATEGORY_ERROR
+        for value in values
+    ]
+
+
+def _titles(values):
+    search = CLICKBAIT_PATTERN.search
+    return [
+        None if isinstance(value, str) and search(value) else TITLE_ERROR
+        for value in values
+    ]
+
+
+# Same order as the model's constructor arguments in the create routes, so
+# the first error for a row matches what the ORM validators would raise.
+RULES = {
+    Author: (('name', _names), ('phone_number', _phone_numbers)),
+    Post: (('title', _titles), ('content', _contents), ('summary', _summaries), ('category', _categories)),
+}
+
+
+def _as_list(column):
+    if hasattr(column, 'to_pylist'):  # pyarrow.Array / ChunkedArray
+        return column.to_pylist()
+    if hasattr(column, 'tolist'):     # numpy.ndarray
+        return column.tolist()
+    return list(column)
+
+
+def _columns(model, rows):
+    fields = [field for field, _ in RULES[model]]
+    if isinstance(rows, dict):
+        columns = {field: _as_list(rows[field]) if field in rows else None for field in fields}
+        lengths = {len(column) for column in columns.values() if column is not None}
+        if len(lengths) > 1:
+            raise ValueError("All columns must have the same length.")
+        count = lengths.pop() if lengths else 0
+        return {field: column if column is not None else [None] * count for field, column in columns.items()}, count, []
+
+    bad_rows = [index for index, row in enumerate(rows) if not isinstance(row, dict)]
+    columns = {
+        field: [row.get(field) if isinstance(row, dict) else None for row in rows]
+        for field in fields
+    }
+    return columns, len(rows), bad_rows
+
+
+def validate_many(model, rows):
+    if model not in RULES:
+        raise ValueError(f"No validation rules for {model.__name__}.")
+
+    columns, count, bad_rows = _columns(model, rows)
+    errors = [None] * count
+    for index in bad_rows:
+        errors[index] = {'row': ROW_ERROR}
+    bad_rows = set(bad_rows)
+
+    for field, check in RULES[model]:
+        for index, message in enumerate(check(columns[field])):
+            if message is None or index in bad_rows:
+                continue
+            if errors[index] is None:
+                errors[index] = {}
+            errors[index][field] = message
+
+    return [error is None for error in errors], errors
+
+
+def first_error(error):
+    # The message the first failing @validates hook would have raised.
+    return next(iter(error.values()))